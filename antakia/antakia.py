@@ -1,5 +1,7 @@
 import pandas as pd
 import numpy as np
+import threading
+import weakref
 
 from antakia.gui import GUI
 from antakia.dataset import Dataset
@@ -14,6 +16,10 @@ from antakia import compute
 from IPython.display import display
 
 from antakia.potato import Potato
+from antakia.regions import RegionSet
+from antakia.cache import DiskCache, MemoryCache, fingerprint_model, fingerprint_data
+from antakia.neighbors import NeighborIndex
+from antakia.figures import MAX_POINTS
 
 import ipyvuetify as v
 
@@ -30,14 +36,23 @@ class AntakIA():
         You can import your own explanations using `import_explanation`.
     regions : list
         The list of the regions computed by the user. A region is an AntakIA object, named Potato. For more information, please see the documentation of the class Potato.
+        Use `newRegion` and `deleteRegion` to modify it, so that the label of the region of each point is kept up to date (see `getRegionLabels`).
     saves : list
         The list of the saves. A save is a list of regions.
     gui : GUI object
         The GUI object is in charge of the interface. For more information, please see the documentation of the class GUI.
+    cache : DiskCache object
+        The on-disk cache of the explanations and of the projections. None if no `cache_dir` was given.
+    model_version : str
+        The version string identifying the model in the cache.
+    skope_cache : MemoryCache object
+        The rules already found for a selection (see `Potato.fitSkope`), the least recently used being forgotten first.
+    potatoes : WeakSet
+        All the Potato objects alive on the dataset : their selections are completed when observations are appended.
     """
 
     # TODO : il faudrait un constructeur __init__(self, dataset) tout court non ?
-    def __init__(self, dataset: Dataset, import_explanation: pd.DataFrame = None, saves: dict = None, saves_path: str = None):
+    def __init__(self, dataset: Dataset, import_explanation: pd.DataFrame = None, saves: dict = None, saves_path: str = None, cache_dir: str = None, cache_size: float = 500, model_version: str = None):
         """
         Constructor of the class AntakIA.
 
@@ -48,18 +63,34 @@ class AntakIA():
         import_explanation : pandas dataframe
             The dataframe containing the explanations. The dataframe must have the same number of rows as the dataset.
             The GUI can compute other types of explanations using different methods.
+        cache_dir : str
+            The directory where the computed explanations and projections are stored. If the model and the dataset have not changed, they are loaded from there instead of being computed again.
+            If None, nothing is stored.
+        cache_size : float
+            The maximum size of the cache, in megabytes. The least recently used entries are removed first.
+        model_version : str
+            A version string identifying the model in the cache. If None, the model is identified by its pickled bytes.
         """
         self.dataset = dataset
+        self.potatoes = weakref.WeakSet()
+        self.cache = DiskCache(cache_dir, cache_size) if cache_dir is not None else None
+        self.model_version = model_version
+        self.skope_cache = MemoryCache(32)
         self.regions = []
         self.gui = None
 
         self.explain = dict()
-        if import_explanation is not None:
-            self.explain["Imported"] = import_explanation.iloc[dataset.frac_indexes].reset_index(drop=True)
-        else:
-            self.explain["Imported"] = None
+        self.__explained = dict()
+        # the fingerprints of the rows sent to each explainer (the whole dataset, or only the new observations), to find their entries in the cache
+        self.__explained_data = {"SHAP": set(), "LIME": set()}
+        self.__neighbors = dict()
+        # the neighbors are asked by the threads of the projections and of the clustering
+        self.__neighbors_lock = threading.Lock()
+        self.explain["Imported"] = None
         self.explain["SHAP"] = None
         self.explain["LIME"] = None
+        if import_explanation is not None:
+            self.setExplanation("Imported", import_explanation.iloc[dataset.frac_indexes])
 
         if saves is not None:
             self.saves = saves
@@ -100,7 +131,38 @@ class AntakIA():
         Function that resets the list of the regions computed by the user.
         """
         self.regions = []
-    
+
+    @property
+    def regions(self) -> list:
+        return self.__regions
+
+    @regions.setter
+    def regions(self, regions: list):
+        self.__regions = regions
+        self.__region_labels = None
+
+    def getRegionLabels(self) -> np.ndarray:
+        """
+        Function that returns the region of each point of the dataset, kept up to date by `newRegion`, `deleteRegion` and `utils._conflict_handler` (it is computed again when `regions` is replaced).
+
+        Returns
+        -------
+        numpy array
+            The index of the region of each point in `regions` (-1 if the point is in no region). If a point is in several regions, the last one is given.
+
+        Examples
+        --------
+        >>> labels = atk.getRegionLabels()
+        >>> sizes = np.bincount(labels[labels >= 0]) # the number of points of each region
+        >>> uncovered = labels < 0 # the points in no region
+        """
+        if self.__region_labels is None or len(self.__region_labels) != len(self.dataset.X):
+            if len(self.__regions) == 0:
+                self.__region_labels = np.full(len(self.dataset.X), -1)
+            else:
+                self.__region_labels = RegionSet.fromRegions(self.__regions).labels
+        return self.__region_labels
+
     def getSaves(self) -> list:
         """
         Function that returns the list of the saves.
@@ -129,6 +191,59 @@ class AntakIA():
         except KeyError:
             raise KeyError("The method " + method + " is not a valid method. The possible methods are " + str(list(self.explain.keys())) + ".")
     
+    def invalidateCache(self, method: str = None):
+        """
+        Function that removes the explanations of the current model and dataset from the cache, including the ones computed only for new observations, and the projections and neighbors of these explanations, and the offsets of the beeswarm plots.
+
+        Parameters
+        ---------
+        method : str
+            The explanations to remove ("SHAP" or "LIME"). If None, both are removed.
+        """
+        if self.gui is not None:
+            self.gui.beeswarm_cache.clear()
+        if self.cache is None:
+            return
+        model = fingerprint_model(self.dataset.model, self.model_version)
+        for m in ([method] if method is not None else ["SHAP", "LIME"]):
+            for data in self.__explained_data[m] | {fingerprint_data(self.dataset.X)}:
+                self.cache.invalidate(kind=m, model=model, data=data)
+            if self.explain[m] is not None:
+                data = fingerprint_data(self.explain[m])
+                self.cache.invalidate(kind="projection", data=data)
+                self.cache.invalidate(kind="neighbors", data=data)
+
+    def getNeighbors(self, space:str = "VS", explanation:str = None) -> NeighborIndex:
+        """
+        Function that returns the nearest neighbors of the observations in a space. They are searched only once, and shared by the projections and the clustering.
+        If a cache is set, they are also stored in it.
+
+        Parameters
+        ---------
+        space : str
+            The space of the neighbors : "VS" (the scaled values of the dataset) or "ES".
+        explanation : str
+            The explanations used for the ES.
+
+        Returns
+        -------
+        NeighborIndex object
+            The nearest neighbors of each observation.
+        """
+        if space == "VS":
+            X = self.dataset.X_scaled
+        else:
+            if self.explain[explanation] is None:
+                raise ValueError("You must compute the explanations before searching their neighbors!")
+            X = self.explain[explanation]
+        with self.__neighbors_lock:
+            index = self.__neighbors.get((space, explanation))
+            # the index is searched again if the data has changed
+            if index is None or not index.matches(X):
+                index = NeighborIndex.build(X, cache=self.cache)
+                self.__neighbors[(space, explanation)] = index
+            return index
+
     def getDataset(self) -> Dataset:
         """
         Function that returns the Dataset object containing the data to explain.
@@ -150,13 +265,76 @@ class AntakIA():
         potato : Potato object
             The Potato object to add to the list of regions.
         """
+        labels = self.getRegionLabels()
         self.regions.append(potato)
+        labels[potato.mask] = len(self.regions) - 1
+
+    def deleteRegion(self, index: int) -> Potato:
+        """
+        Function that removes a region from the list of regions.
+
+        Parameters
+        ---------
+        index : int
+            The index of the region in `regions`.
+
+        Returns
+        -------
+        Potato object
+            The region removed.
+        """
+        labels = self.getRegionLabels()
+        potato = self.regions.pop(index)
+        freed = np.flatnonzero(labels == index)
+        labels[freed] = -1
+        labels[labels > index] -= 1
+        # the points of the region go to the last older region containing them (the newer ones do not contain them)
+        for j in range(index - 1, -1, -1):
+            if len(freed) == 0:
+                break
+            inside = self.regions[j].mask[freed]
+            labels[freed[inside]] = j
+            freed = freed[~inside]
+        return potato
+
+    def getRegionSet(self, apply_rules: bool = False) -> RegionSet:
+        """
+        Function that returns the regions as a RegionSet : the region of each point, and the points shared by the regions.
+
+        Parameters
+        ---------
+        apply_rules : bool
+            If True, the rules of the regions are evaluated (all at once) instead of using their current selection.
+
+        Returns
+        -------
+        RegionSet object
+            The regions.
+        """
+        return RegionSet.fromRegions(self.regions, apply_rules)
+
+    def applyRegionRules(self) -> RegionSet:
+        """
+        Function that applies the rules of all the regions at once : each region with rules gets the points respecting them.
+
+        Returns
+        -------
+        RegionSet object
+            The regions, after the rules are applied.
+        """
+        region_set = self.getRegionSet(apply_rules=True)
+        for j, region in enumerate(self.regions):
+            if region.rules is not None:
+                region.mask = region_set.masks[:, j].copy()
+        self.__region_labels = region_set.labels
+        return region_set
 
     def startGUI(self,
                 explanation: str = None,
                 projection: str = "PaCMAP",
                 sub_models: list = None,
-                display = True) -> GUI:
+                display = True,
+                max_points: int = MAX_POINTS) -> GUI:
         """
         Function that instantiates the GUI and calls its display() function.
         For more information, please see the documentation of the class GUI.
@@ -172,12 +350,17 @@ class AntakIA():
             The list of the sub_models to choose from for each region. The only constraint is that sub_models must have a predict method.
         display : bool
             If True, the interface is displayed. Else, You can access the interface with the attribute gui of the class.
+        max_points : int
+            Above this number of observations, the figures switch to a large-data mode : they are drawn with WebGL and only show a subsample of the points, completed when zooming.
         """
-        self.gui = GUI(self, explanation, projection, sub_models)
+        # the previous interface stops computing its projections
+        if self.gui is not None:
+            self.gui.close()
+        self.gui = GUI(self, explanation, projection, sub_models, max_points)
         if display:
             self.gui.display()
 
-    def computeDyadicClustering(self, explanation:str = "Imported", min_clusters:int = 3, automatic:bool = True, sub_models:bool = False):
+    def computeDyadicClustering(self, explanation:str = "Imported", min_clusters:int = 3, automatic:bool = True, sub_models:bool = False, use_neighbors:bool = False, rule_engine:str = "skope"):
         """
         Function that computes the dyadic-clustering.
         Our dyadic-clustering (sometimes found as co-clusetring or bi-clustering), uses `mvlearn` and `skope-rules` to compute the clusters.
@@ -193,17 +376,23 @@ class AntakIA():
             If True, the number of clusters is computed automatically, respecting the minimum number of clusters.
         sub_models : bool
             If True, the best model for each region is computed. The possible models are the ones in the list sub_models.
+        use_neighbors : bool
+            If True, the agglomerative clustering only merges neighbors in the VS (see `getNeighbors`), which is much faster on large datasets.
+        rule_engine : str
+            The rule learner : "skope" for SkopeRules, "native" for the faster `antakia.rules.IntervalRules`.
         """
         if self.explain[explanation] is None:
             raise ValueError("You must compute the explanations before computing the dyadic-clustering!")
         if min_clusters <2 or min_clusters > len(self.dataset.X):
             raise ValueError("The minimum number of clusters must be between 2 and the number of observations!")
-        clusters, clusters_axis = function_auto_clustering(self.dataset.X, self.explain[explanation], min_clusters, automatic)
-        self.regions = []
+        neighbors = self.getNeighbors("VS") if use_neighbors else None
+        clusters, clusters_axis = function_auto_clustering(self.dataset.X, self.explain[explanation], min_clusters, automatic, neighbors, rule_engine)
+        regions = []
         for i in range(len(clusters)):
-            self.regions.append(Potato(self, clusters[i]))
+            regions.append(Potato(self, clusters[i]))
             if sub_models:
-                self.regions[i].sub_model["model"], self.regions[i].sub_model["score"] = self.__find_best_model(self.regions[i].data, self.regions[i].y, self.gui.sub_models)
+                regions[i].sub_model["model"], regions[i].sub_model["score"] = self.__find_best_model(regions[i].data, regions[i].y, self.gui.sub_models)
+        self.regions = regions
 
     def __find_best_model(self, X:pd.DataFrame, y:pd.Series, sub_models:list):
         best_model = None
@@ -243,7 +432,7 @@ class AntakIA():
         self.widget = widget
 
     
-    def computeSHAP(self, verbose:bool = True):
+    def computeSHAP(self, verbose:bool = True, batch_size:int = 100, n_jobs:int = 1):
         """
         Computes the SHAP values of the dataset.
 
@@ -251,20 +440,18 @@ class AntakIA():
         ---------
         verbose : bool
             If True, a progress bar is displayed.
+        batch_size : int
+            The number of rows sent at once to the explainer. The progress bar is updated after each batch.
+        n_jobs : int
+            The number of processes sharing the computation. If -1, all the CPU cores are used.
 
         See also:
         ---------
         The Shap library on GitHub : https://github.com/shap/shap/tree/master
         """
-        shap = compute.computationSHAP(self.dataset.X, self.dataset.X_all, self.dataset.model)
-        if verbose:
-            self.verbose = self.__create_progress("SHAP")
-            widgets.jslink((self.widget.children[1], "v_model"), (shap.progress_widget, "v_model"))
-            widgets.jslink((self.widget.children[2], "v_model"), (shap.text_widget, "v_model"))
-            display(self.widget)
-        self.explain["SHAP"] = shap.compute()
+        self.setExplanation("SHAP", self.__explain_rows("SHAP", self.dataset.X, verbose, batch_size=batch_size, n_jobs=n_jobs))
 
-    def computeLIME(self, verbose:bool = True):
+    def computeLIME(self, verbose:bool = True, n_jobs:int = 1, num_samples:int = 5000):
         """
         Computes the LIME values of the dataset.
 
@@ -272,15 +459,138 @@ class AntakIA():
         ---------
         verbose : bool
             If True, a progress bar is displayed.
+        n_jobs : int
+            The number of processes sharing the computation. If -1, all the CPU cores are used.
+        num_samples : int
+            The size of the neighborhood sampled around each observation to fit the local linear model.
 
         See also:
         ---------
         The Lime library on GitHub : https://github.com/marcotcr/lime/tree/master
         """
-        lime = compute.computationSHAP(self.dataset.X, self.dataset.X_all, self.dataset.model)
+        self.setExplanation("LIME", self.__explain_rows("LIME", self.dataset.X, verbose, n_jobs=n_jobs, num_samples=num_samples))
+
+    def __explain_rows(self, method:str, X:pd.DataFrame, verbose:bool, **kwargs) -> pd.DataFrame:
+        if method == "SHAP":
+            task = compute.computationSHAP(X, self.dataset.X_all, self.dataset.model, cache=self.cache, model_version=self.model_version, **kwargs)
+        elif method == "LIME":
+            task = compute.computationLIME(X, self.dataset.X_all, self.dataset.model, cache=self.cache, model_version=self.model_version, **kwargs)
+        else:
+            raise ValueError("The method " + method + " cannot be computed. The possible methods are SHAP and LIME.")
+        self.__explained_data[method].add(fingerprint_data(X))
         if verbose:
-            self.verbose = self.__create_progress("LIME")
-            widgets.jslink((self.widget.children[1], "v_model"), (lime.progress_widget, "v_model"))
-            widgets.jslink((self.widget.children[2], "v_model"), (lime.text_widget, "v_model"))
+            self.verbose = self.__create_progress(method)
+            widgets.jslink((self.widget.children[1], "v_model"), (task.progress_widget, "v_model"))
+            widgets.jslink((self.widget.children[2], "v_model"), (task.text_widget, "v_model"))
             display(self.widget)
-        self.explain["LIME"] = lime.compute()
\ No newline at end of file
+        return task.compute()
+
+    def setExplanation(self, method:str, explanation:pd.DataFrame):
+        """
+        Function that sets the explanations of a method. The rows of `explanation` must be aligned with the rows of `dataset.X`.
+        The observations explained are recorded, so that `updateExplanations` only computes the new or modified ones.
+
+        Parameters
+        ---------
+        method : str
+            The name of the explanations ("Imported", "SHAP" or "LIME").
+        explanation : pandas dataframe
+            The explanatory values.
+        """
+        if len(explanation) != len(self.dataset.X):
+            raise ValueError("The explanations must have the same number of rows as the dataset!")
+        self.explain[method] = explanation.reset_index(drop=True)
+        # the rules found with the previous explanations are not needed anymore
+        self.skope_cache.invalidate()
+        self.__explained[method] = (np.asarray(self.dataset.frac_indexes), self.dataset.rowHashes())
+
+    def updateExplanations(self, method:str = None, verbose:bool = True, **kwargs) -> dict:
+        """
+        Computes the explanations of the observations that are new or have been modified since the last computation. The other explanations are reused as they are.
+
+        Parameters
+        ---------
+        method : str
+            The explanations to update ("SHAP" or "LIME"). If None, all the explanations already computed are updated.
+        verbose : bool
+            If True, a progress bar is displayed.
+        **kwargs
+            Passed to `computeSHAP` or `computeLIME` (for example `n_jobs`).
+
+        Returns
+        -------
+        dict
+            The number of observations computed for each method.
+        """
+        if method is not None:
+            methods = [method]
+        else:
+            methods = [m for m in ["SHAP", "LIME"] if self.explain[m] is not None]
+        ids = np.asarray(self.dataset.frac_indexes)
+        hashes = self.dataset.rowHashes()
+        computed = dict()
+        for m in methods:
+            todo = np.ones(len(ids), dtype=bool)
+            values = np.zeros((len(ids), self.dataset.X.shape[1]))
+            columns = None
+            if self.explain[m] is not None and m in self.__explained:
+                old_ids, old_hashes = self.__explained[m]
+                # position of each observation in the previous explanations (NaN if it is new)
+                position = pd.Series(np.arange(len(old_ids)), index=old_ids).reindex(ids).values
+                known = ~np.isnan(position)
+                todo[known] = old_hashes[position[known].astype(int)] != hashes[known]
+                kept = ~todo
+                values[kept] = self.explain[m].values[position[kept].astype(int)]
+                columns = self.explain[m].columns
+            if todo.any():
+                new = self.__explain_rows(m, self.dataset.X[todo], verbose, **kwargs)
+                values[todo] = new.values
+                columns = new.columns
+            self.setExplanation(m, pd.DataFrame(values, columns=columns))
+            computed[m] = int(todo.sum())
+        return computed
+
+    def appendData(self, X:pd.DataFrame, y:pd.Series = None, import_explanation:pd.DataFrame = None, update_explanations:bool = True, verbose:bool = True):
+        """
+        Appends new observations to the dataset. The explanations already computed are kept, and only the new observations are explained.
+        The new observations are placed in the projections of the GUI without computing them again.
+        The explanations of the previous observations are not recomputed with the new background data: call `computeSHAP` or `computeLIME` to refresh all of them.
+
+        Parameters
+        ---------
+        X : pandas dataframe
+            The new observations.
+        y : pandas series
+            The target values of the new observations.
+        import_explanation : pandas dataframe
+            The imported explanations of the new observations. Mandatory if explanations were imported.
+        update_explanations : bool
+            If True, the SHAP and LIME values already computed are completed with the new observations.
+        verbose : bool
+            If True, a progress bar is displayed.
+        """
+        if self.explain["Imported"] is not None and import_explanation is None:
+            raise ValueError("You must provide the imported explanations of the new observations!")
+        if import_explanation is not None and len(import_explanation) != len(X):
+            raise ValueError("The imported explanations must have the same number of rows as X!")
+        self.dataset.append(X, y)
+        self.skope_cache.invalidate()
+        # the selections are completed with the new observations, which are in none of them
+        for potato in list(self.potatoes):
+            potato.resize(len(self.dataset.X))
+        if self.__region_labels is not None:
+            self.__region_labels = np.concatenate([self.__region_labels, np.full(len(X), -1)])
+        if self.explain["Imported"] is not None:
+            imported = pd.concat([self.explain["Imported"], import_explanation.set_axis(self.explain["Imported"].columns, axis=1)], ignore_index=True)
+            self.setExplanation("Imported", imported)
+        if update_explanations:
+            self.updateExplanations(verbose=verbose)
+        else:
+            # the explanations stay aligned with the dataset : the new observations are NaN until `updateExplanations` computes them
+            for m in ["SHAP", "LIME"]:
+                if self.explain[m] is not None:
+                    missing = pd.DataFrame(np.nan, index=range(len(X)), columns=self.explain[m].columns)
+                    self.explain[m] = pd.concat([self.explain[m], missing], ignore_index=True)
+        # the new observations are placed in the projections already computed
+        if self.gui is not None:
+            self.gui.addObservations(len(X))
@@ -0,0 +1,303 @@
+"""
+Cache module for the antakia package : long computations are stored on disk, to be reused from one session to another, or in memory for the ones that are only reused during a session.
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import cloudpickle
+
+
+def fingerprint_model(model, version: str = None) -> str:
+    """Return a fingerprint of a model.
+
+    Parameters
+    ---------
+    model : model object
+        The model to fingerprint.
+    version : str
+        A version string given by the user. If not None, it is used instead of the pickled bytes of the model.
+
+    Returns
+    -------
+    str
+        The fingerprint of the model.
+    """
+    if version is not None:
+        return "version:" + str(version)
+    return hashlib.sha256(cloudpickle.dumps(model)).hexdigest()
+
+
+def fingerprint_data(X) -> str:
+    """Return a fingerprint of the contents of a dataframe (values, index and columns).
+
+    Parameters
+    ---------
+    X : pandas dataframe
+        The dataframe to fingerprint.
+
+    Returns
+    -------
+    str
+        The fingerprint of the dataframe.
+    """
+    X = pd.DataFrame(X)
+    h = hashlib.sha256(pd.util.hash_pandas_object(X, index=True).values.tobytes())
+    h.update(json.dumps([str(c) for c in X.columns] + [str(t) for t in X.dtypes]).encode())
+    return h.hexdigest()
+
+
+def fingerprint_mask(mask) -> str:
+    """Return a fingerprint of a boolean mask (for example the points of a selection).
+    """
+    mask = np.asarray(mask).astype(bool)
+    h = hashlib.sha256(np.packbits(mask).tobytes())
+    h.update(str(len(mask)).encode())
+    return h.hexdigest()
+
+
+def make_key(*parts) -> str:
+    """Return a cache key from a list of json-serializable parts.
+    """
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class DiskCache():
+    """
+    A cache of numpy arrays, stored as .npy files in a directory.
+    When the size of the directory exceeds `max_size`, the least recently used entries are removed.
+    The access times of the reads are written to the index with the next `set`, `invalidate` or `flush`.
+
+    Attributes
+    ----------
+    path : str
+        The directory of the cache.
+    max_size : float
+        The maximum size of the cache, in megabytes.
+    """
+    INDEX = "index.json"
+
+    def __init__(self, path: str, max_size: float = 500):
+        """
+        Constructor of the class DiskCache.
+
+        Parameters
+        ----------
+        path : str
+            The directory of the cache. It is created if it does not exist.
+        max_size : float
+            The maximum size of the cache, in megabytes.
+        """
+        self.path = os.path.expanduser(path)
+        self.max_size = max_size
+        self.__lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+        self.__index = self.__read_index()
+        # True when the index in memory has changes not written to the disk
+        self.__dirty = False
+
+    def __read_index(self):
+        try:
+            with open(os.path.join(self.path, DiskCache.INDEX)) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # entries whose file has been removed by hand are forgotten
+        return {key: entry for key, entry in index.items() if os.path.exists(self.__file(key))}
+
+    def __write_index(self):
+        # a temporary file of its own, so that two processes sharing the directory never rename the same file
+        with tempfile.NamedTemporaryFile("w", dir=self.path, suffix=".tmp", delete=False) as f:
+            json.dump(self.__index, f)
+        os.replace(f.name, os.path.join(self.path, DiskCache.INDEX))
+        self.__dirty = False
+
+    def __file(self, key):
+        return os.path.join(self.path, key + ".npy")
+
+    def __len__(self):
+        return len(self.__index)
+
+    def __contains__(self, key):
+        return key in self.__index
+
+    def size(self) -> float:
+        """
+        Function that returns the size of the cache.
+
+        Returns
+        -------
+        float
+            The size of the cache, in megabytes.
+        """
+        return sum(entry["size"] for entry in self.__index.values()) / 2**20
+
+    def get(self, key: str):
+        """
+        Function that returns the array stored under `key`.
+
+        Parameters
+        ----------
+        key : str
+            The key of the entry.
+
+        Returns
+        -------
+        numpy array
+            The array, or None if the key is not in the cache.
+        """
+        with self.__lock:
+            if key not in self.__index:
+                return None
+            try:
+                value = np.load(self.__file(key), allow_pickle=False)
+            except (OSError, ValueError):
+                del self.__index[key]
+                self.__dirty = True
+                return None
+            # only in memory : a read does not rewrite the index
+            self.__index[key]["last_access"] = time.time()
+            self.__dirty = True
+            return value
+
+    def set(self, key: str, value, **tags):
+        """
+        Function that stores an array under `key`.
+
+        Parameters
+        ----------
+        key : str
+            The key of the entry.
+        value : numpy array or pandas dataframe
+            The array to store.
+        **tags : str
+            Informations on the entry, used by `invalidate`.
+        """
+        with self.__lock:
+            with tempfile.NamedTemporaryFile(dir=self.path, suffix=".tmp", delete=False) as f:
+                np.save(f, np.asarray(value), allow_pickle=False)
+            os.replace(f.name, self.__file(key))
+            self.__index[key] = {"size": os.path.getsize(self.__file(key)), "last_access": time.time(), "tags": tags}
+            self.__evict()
+            self.__write_index()
+
+    def __evict(self):
+        # least recently used entries first
+        keys = sorted(self.__index, key=lambda k: self.__index[k]["last_access"])
+        total = sum(entry["size"] for entry in self.__index.values())
+        while keys and total > self.max_size * 2**20:
+            key = keys.pop(0)
+            total -= self.__index[key]["size"]
+            self.__remove(key)
+
+    def __remove(self, key):
+        del self.__index[key]
+        try:
+            os.remove(self.__file(key))
+        except OSError:
+            pass
+
+    def invalidate(self, key: str = None, **tags) -> int:
+        """
+        Function that removes entries from the cache.
+
+        Parameters
+        ----------
+        key : str
+            The key of the entry to remove. If None, all the entries matching `tags` are removed (all the entries if no tag is given).
+        **tags : str
+            The tags the removed entries must match.
+
+        Returns
+        -------
+        int
+            The number of entries removed.
+
+        Examples
+        --------
+        >>> cache.invalidate(kind="SHAP") # removes all the SHAP values
+        >>> cache.invalidate() # empties the cache
+        """
+        with self.__lock:
+            if key is not None:
+                keys = [key] if key in self.__index else []
+            else:
+                keys = [
+                    k for k, entry in self.__index.items()
+                    if all(entry["tags"].get(tag) == value for tag, value in tags.items())
+                ]
+            for k in keys:
+                self.__remove(k)
+            self.__write_index()
+            return len(keys)
+
+    def flush(self):
+        """
+        Function that writes the access times of the last reads to the index.
+        """
+        with self.__lock:
+            if self.__dirty:
+                self.__write_index()
+
+
+class MemoryCache():
+    """
+    A cache of python objects kept in memory. When it holds more than `max_entries` entries, the least recently used ones are removed.
+
+    Attributes
+    ----------
+    max_entries : int
+        The maximum number of entries.
+    """
+    def __init__(self, max_entries: int = 64):
+        """
+        Constructor of the class MemoryCache.
+
+        Parameters
+        ----------
+        max_entries : int
+            The maximum number of entries.
+        """
+        self.max_entries = max_entries
+        self.__lock = threading.Lock()
+        self.__entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, key):
+        return key in self.__entries
+
+    def get(self, key: str):
+        """
+        Function that returns the object stored under `key`, or None if the key is not in the cache.
+        """
+        with self.__lock:
+            if key not in self.__entries:
+                return None
+            self.__entries.move_to_end(key)
+            return self.__entries[key]
+
+    def set(self, key: str, value):
+        """
+        Function that stores an object under `key`.
+        """
+        with self.__lock:
+            self.__entries[key] = value
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+
+    def invalidate(self):
+        """
+        Function that empties the cache.
+        """
+        with self.__lock:
+            self.__entries.clear()
@@ -2,12 +2,19 @@ import pandas as pd
 import numpy as np
 import threading
 import time
+import os
+import multiprocessing
+import pickle
+import cloudpickle
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from abc import ABC, abstractmethod
 import ipyvuetify as v
+import ipywidgets as widgets
 
 # Imports for the dimensionality reduction
 from sklearn.manifold import TSNE
 from sklearn.decomposition import PCA
+from sklearn.neighbors import NearestNeighbors, sort_graph_by_row_values
 import umap
 import pacmap
 
@@ -16,6 +23,28 @@ import lime
 import lime.lime_tabular
 import shap
 
+from antakia.cache import fingerprint_model, fingerprint_data, make_key
+from sklearn.base import is_regressor
+from sklearn import ensemble, tree
+
+# state of the explainer in the worker processes, see LongTask._compute_values
+_worker_state = None
+
+def _init_worker(task_class, X_all, model, params, explainer=None):
+    # called once per worker process : the model and X_all (or the explainer fitted by the parent) are unpickled only once
+    # the model comes from cloudpickle : a class defined in a notebook cannot be imported by the workers
+    global _worker_state
+    model = pickle.loads(model)
+    if explainer is not None:
+        explainer = pickle.loads(explainer)
+    else:
+        explainer = task_class._explainer(X_all, model, **params)
+    _worker_state = (task_class, explainer, model, params)
+
+def _explain_shard(start, X, seed):
+    task_class, explainer, model, params = _worker_state
+    return start, task_class._explain(explainer, model, X, seed, **params)
+
 class LongTask(ABC):
     '''
     Abstract class to compute long tasks, often in a separate thread.
@@ -28,11 +57,33 @@ class LongTask(ABC):
         The dataframe containing the entire dataset, in order for the explanations to be computed.
     model : model object
         The "black-box" model to explain.
+    batch_size : int
+        The number of rows explained at once. The progress is updated after each batch.
+    n_jobs : int
+        The number of processes used to compute the explanations. If -1, all the CPU cores are used.
+    cache : DiskCache object
+        If not None, the explanations are looked up in this cache before being computed, and stored in it afterwards.
+    model_version : str
+        A version string identifying the model in the cache. If None, the model is identified by its pickled bytes.
+    seed : int
+        The seed of the random explainers. The batch starting at row i uses the seed `seed + i` : the explanations do not depend on `n_jobs`.
     '''
-    def __init__(self, X, X_all, model):
+    # name of the explanations in the cache
+    name = None
+    # if True, the explainer is fitted once by the parent process and shared with the workers
+    share_explainer = False
+    # below this number of rows, starting the worker processes takes longer than the explanations : they are computed in this process
+    min_parallel_rows = 1000
+
+    def __init__(self, X, X_all, model, batch_size=100, n_jobs=1, cache=None, model_version=None):
         self.X = X
         self.X_all = X_all
         self.model = model
+        self.batch_size = batch_size
+        self.n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+        self.cache = cache
+        self.model_version = model_version
+        self.seed = 0
 
         self.progress = 0
         self.progress_widget = v.Textarea(v_model=0)
@@ -48,6 +99,100 @@ class LongTask(ABC):
         """
         pass
 
+    @staticmethod
+    def _explainer(X_all, model, **params):
+        """
+        Method that builds the explainer, once per process.
+        """
+        return None
+
+    @staticmethod
+    def _explain(explainer, model, X, seed, **params):
+        """
+        Method that explains the rows of X and returns them as a numpy array. The random explainers are seeded with `seed`.
+        """
+        raise NotImplementedError
+
+    def _params(self):
+        """
+        Method that returns the parameters passed to `_explainer` and `_explain`.
+        """
+        return {}
+
+    def _compute_values(self):
+        """
+        Method that explains all the rows of X, by batches of `batch_size` rows.
+        If `n_jobs` > 1 and X has at least `min_parallel_rows` rows, the batches are shared between several processes, and merged back in the order of X.
+        If the processes cannot be used (a model that cannot be pickled, for example), the batches are computed in this process.
+
+        Returns
+        -------
+        numpy array
+            The explanations, of shape (len(X), number of features).
+        """
+        time_init = time.time()
+        N = len(self.X)
+        params = self._params()
+
+        if self.cache is not None:
+            tags = {"kind": self.name, "model": fingerprint_model(self.model, self.model_version), "data": fingerprint_data(self.X)}
+            key = make_key(tags, fingerprint_data(self.X_all), params, self.seed)
+            values = self.cache.get(key)
+            if values is not None:
+                self.progress = 100
+                self.progress_widget.v_model = self.progress
+                self.text_widget.v_model = "Loaded from the cache"
+                return values
+
+        values = np.zeros((N, self.X.shape[1]))
+        done = 0
+
+        def update_progress(done):
+            self.progress = 100 * done / N
+            self.progress_widget.v_model = self.progress
+            self.text_widget.v_model = self.generation_texte(done - 1, N, time_init, self.progress)
+
+        starts = range(0, N, self.batch_size)
+        computed = set()
+        if self.n_jobs is not None and self.n_jobs > 1 and N >= self.min_parallel_rows:
+            try:
+                model = cloudpickle.dumps(self.model)
+                if self.share_explainer:
+                    # cloudpickle, as some explainers hold lambdas
+                    initargs = (type(self), None, model, params, cloudpickle.dumps(self._explainer(self.X_all, self.model, **params)))
+                else:
+                    initargs = (type(self), self.X_all, model, params)
+                with ProcessPoolExecutor(
+                    max_workers=self.n_jobs,
+                    # fork is not safe with the threads of the kernel (and of numba)
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=initargs,
+                ) as executor:
+                    shards = [
+                        executor.submit(_explain_shard, start, self.X[start : start + self.batch_size], self.seed + start)
+                        for start in starts
+                    ]
+                    for shard in as_completed(shards):
+                        start, shard_values = shard.result()
+                        values[start : start + len(shard_values)] = shard_values
+                        computed.add(start)
+                        done += len(shard_values)
+                        update_progress(done)
+            except Exception as e:
+                print("AntakIA WARNING : the explanations could not be computed in parallel (" + str(e) + "), they are computed in this process")
+        remaining = [start for start in starts if start not in computed]
+        if len(remaining) > 0:
+            explainer = self._explainer(self.X_all, self.model, **params)
+            for start in remaining:
+                end = min(start + self.batch_size, N)
+                values[start:end] = self._explain(explainer, self.model, self.X[start:end], self.seed + start, **params)
+                done += end - start
+                update_progress(done)
+        if self.cache is not None:
+            self.cache.set(key, values, **tags)
+        return values
+
     def compute_in_thread(self):
         """
         Method to compute the long task in a separate thread.
@@ -81,27 +226,79 @@ class LongTask(ABC):
             + "s)"
         )
 
+def _shap_algorithm(model):
+    # the tree and linear explainers are exact and much faster than the model-agnostic one,
+    # they are only used for regressors, whose prediction is the explained output
+    if not is_regressor(model):
+        return "permutation"
+    tree_models = (
+        tree.BaseDecisionTree,
+        ensemble.RandomForestRegressor,
+        ensemble.ExtraTreesRegressor,
+        ensemble.GradientBoostingRegressor,
+    )
+    if isinstance(model, tree_models) or type(model).__module__.split(".")[0] in ["xgboost", "lightgbm", "catboost"]:
+        return "tree"
+    if type(model).__module__.startswith("sklearn.linear_model") and hasattr(model, "coef_"):
+        return "linear"
+    return "permutation"
+
 class computationSHAP(LongTask):
     """
     SHAP computation class.
+
+    The rows of `X` are sent to the explainer by chunks of `batch_size` rows, and the progress is updated once per chunk.
+    Tree ensembles and linear models are explained with the exact TreeSHAP and LinearSHAP algorithms.
+    Other models are explained with the model-agnostic permutation algorithm, using a sample of `X_all` as background (the same sample as `shap.Explainer(model.predict, X_all)`).
+
+    Attributes
+    ----------
+    algorithm : str
+        The algorithm used : "tree", "linear" or "permutation". If "auto", it is chosen according to the model.
+    background_size : int
+        The number of rows of `X_all` sampled as background for the permutation algorithm.
+    duration : float
+        The duration of the computation, in seconds.
     """
+    name = "SHAP"
+
+    def __init__(self, X, X_all, model, batch_size=100, n_jobs=1, cache=None, model_version=None, algorithm="auto", background_size=100):
+        super().__init__(X, X_all, model, batch_size, n_jobs, cache, model_version)
+        if algorithm == "auto":
+            algorithm = _shap_algorithm(model)
+        self.algorithm = algorithm
+        self.background_size = background_size
+        self.duration = None
+
+    def _params(self):
+        return {"algorithm": self.algorithm, "background_size": self.background_size}
+
+    @staticmethod
+    def _explainer(X_all, model, algorithm, background_size):
+        if algorithm == "tree":
+            return shap.TreeExplainer(model)
+        if algorithm == "linear":
+            return shap.LinearExplainer(model, X_all)
+        background = shap.sample(np.array(X_all), background_size)
+        return shap.Explainer(model.predict, shap.maskers.Independent(background, max_samples=len(background)), algorithm="permutation")
+
+    @staticmethod
+    def _explain(explainer, model, X, seed, algorithm, background_size):
+        if algorithm == "permutation":
+            # the permutations are drawn with the global random generator of numpy
+            np.random.seed(seed)
+            return explainer(np.array(X), max_evals=1400, silent=True).values
+        return explainer(X).values
+
     def compute(self):
         self.progress = 0
         self.done_widget.v_model = "primary"
         self.text_widget.v_model = None
         time_init = time.time()
-        explainer = shap.Explainer(self.model.predict, self.X_all)
-        shap_values = pd.DataFrame().reindex_like(self.X)
-        j = list(self.X.columns)
-        for i in range(len(j)):
-            j[i] = j[i] + "_shap"
-        for i in range(len(self.X)):
-            shap_value = explainer(self.X[i : i + 1], max_evals=1400)
-            shap_values.iloc[i] = shap_value.values
-            self.progress += 100 / len(self.X)
-            self.progress_widget.v_model = self.progress
-            self.text_widget.v_model = self.generation_texte(i, len(self.X), time_init, self.progress_widget.v_model)
-        shap_values.columns = j
+        values = self._compute_values()
+        self.duration = time.time() - time_init
+        self.text_widget.v_model = str(self.text_widget.v_model) + " - " + self.algorithm + " algorithm"
+        shap_values = pd.DataFrame(values, index=self.X.index, columns=[col + "_shap" for col in self.X.columns])
         self.value = shap_values
         self.done_widget.v_model = "success"
         return shap_values
@@ -109,34 +306,53 @@ class computationSHAP(LongTask):
 class computationLIME(LongTask):
     """
     LIME computation class.
+
+    The LimeTabularExplainer is fitted once on `X_all`. If `n_jobs` > 1, this fitted explainer is shared with the worker processes.
+
+    Attributes
+    ----------
+    num_samples : int
+        The size of the neighborhood sampled around each row to fit the local linear model.
     """
-    
+    name = "LIME"
+    share_explainer = True
+    min_parallel_rows = 100
+
+    def __init__(self, X, X_all, model, batch_size=10, n_jobs=1, cache=None, model_version=None, num_samples=5000):
+        super().__init__(X, X_all, model, batch_size, n_jobs, cache, model_version)
+        self.num_samples = num_samples
+
+    def _params(self):
+        return {"num_samples": self.num_samples}
+
+    @staticmethod
+    def _explainer(X_all, model, num_samples):
+        return lime.lime_tabular.LimeTabularExplainer(np.array(X_all), feature_names=list(X_all.columns), verbose=False, mode='regression')
+
+    @staticmethod
+    def _explain(explainer, model, X, seed, num_samples):
+        # the neighborhoods are sampled with the random state of the explainer, which is shared by its discretizer
+        explainer.random_state = explainer.base.random_state = np.random.RandomState(seed)
+        if explainer.discretizer is not None:
+            explainer.discretizer.random_state = explainer.random_state
+        taille = X.shape[-1]
+        LIME = np.zeros((len(X), taille))
+        rows = np.array(X)
+        for j in range(len(rows)):
+            exp = explainer.explain_instance(
+                rows[j], model.predict, num_features=taille, num_samples=num_samples
+            )
+            # (feature, weight) pairs, sorted by decreasing weight : we put them back in the order of the features
+            features, weights = zip(*exp.as_map()[0])
+            LIME[j, list(features)] = weights
+        return LIME
+
     def compute(self):
         self.done_widget.v_model = "primary"
         self.progress_widget.v_model = 0
         self.text_widget.v_model = None
-        time_init = time.time()
-        explainer = lime.lime_tabular.LimeTabularExplainer(np.array(self.X_all), feature_names=self.X.columns, class_names=['price'], verbose=False, mode='regression')
-        N = len(self.X)
-        LIME = pd.DataFrame(np.zeros((N, self.X.shape[-1])))
-        l = []
-        for j in range(N):
-            l = []
-            exp = explainer.explain_instance(
-                self.X.values[j], self.model.predict
-            )
-            l = []
-            taille = self.X.shape[-1]
-            for ii in range(taille):
-                exp_map = exp.as_map()[0]
-                l.extend(exp_map[ii][1] for jj in range(taille) if ii == exp_map[jj][0])
-            LIME.iloc[j] = l
-            self.progress_widget.v_model  += 100 / len(self.X)
-            self.text_widget.v_model = self.generation_texte(j, len(self.X), time_init, self.progress_widget.v_model)
-        j = list(self.X.columns)
-        for i in range(len(j)):
-            j[i] = j[i] + "_shap"
-        LIME.columns = j
+        values = self._compute_values()
+        LIME = pd.DataFrame(values, index=self.X.index, columns=[col + "_lime" for col in self.X.columns])
         self.value = LIME
         self.done_widget.v_model = "success"
         return LIME
@@ -154,6 +370,30 @@ class DimensionalityReduction(ABC):
     @abstractmethod
     def compute(self):
         pass
+
+    def compute_multi(self, X, dimensions, default=True, *args, neighbors=None):
+        """
+        Computes the projections of X in several dimensions. The methods that can share some work between the dimensions (a fit, a neighbors graph...) override this function.
+
+        Parameters
+        ----------
+        X : pandas dataframe
+            The data to project.
+        dimensions : list
+            The dimensions of the projections, for example [2, 3].
+        default : bool
+            If True, the default parameters of the method are used. Else, they are given by *args.
+        neighbors : NeighborIndex object
+            The nearest neighbors of the observations of X, used by the methods based on a neighbors graph instead of searching them again.
+
+        Returns
+        -------
+        list
+            The projections, as pandas dataframes, in the order of `dimensions`.
+        """
+        # the reducers are not kept : new observations are placed by interpolation (see Projection)
+        self.reducers = None
+        return [self.compute(X, n, default, *args) for n in dimensions]
         
 class computationPCA(DimensionalityReduction):
     """
@@ -167,7 +407,19 @@ class computationPCA(DimensionalityReduction):
         X_pca = pca.transform(X)
         X_pca = pd.DataFrame(X_pca)
         return X_pca
+
+    def compute_multi(self, X, dimensions, default=True, *args, neighbors=None):
+        # the first components do not depend on the number of components : one fit is enough
+        pca = PCA(n_components=max(dimensions))
+        X_pca = pca.fit_transform(X)
+        self.reducers = [pca] * len(dimensions)
+        return [pd.DataFrame(X_pca[:, :n]) for n in dimensions]
     
+def _pca_init(X, n):
+    # the initialization of TSNE(init="pca"), which cannot be asked with a precomputed metric
+    X_pca = PCA(n_components=n, svd_solver="randomized").fit_transform(X).astype(np.float32)
+    return X_pca / np.std(X_pca[:, 0]) * 1e-4
+
 class computationTSNE(DimensionalityReduction):
     """
     t-SNE computation class.
@@ -179,6 +431,16 @@ class computationTSNE(DimensionalityReduction):
         X_tsne = tsne.fit_transform(X)
         X_tsne = pd.DataFrame(X_tsne)
         return X_tsne
+
+    def compute_multi(self, X, dimensions, default=True, *args, neighbors=None):
+        perplexity = TSNE().perplexity
+        k = min(len(X) - 1, int(3 * perplexity + 1))
+        if neighbors is None or neighbors.n_neighbors <= k:
+            return super().compute_multi(X, dimensions, default, *args)
+        # the sparse graph of the neighbors replaces the search of t-SNE
+        graph = sort_graph_by_row_values(neighbors.graph(k, include_self=True), warn_when_not_sorted=False)
+        self.reducers = None
+        return [pd.DataFrame(TSNE(n_components=n, metric="precomputed", init=_pca_init(X, n)).fit_transform(graph)) for n in dimensions]
     
 class computationUMAP(DimensionalityReduction):
     """
@@ -190,25 +452,53 @@ class computationUMAP(DimensionalityReduction):
         embedding = reducer.fit_transform(X)
         embedding = pd.DataFrame(embedding)
         return embedding
+
+    def compute_multi(self, X, dimensions, default=True, *args, neighbors=None):
+        # the nearest neighbors graph does not depend on the dimension of the projection
+        n_neighbors = umap.UMAP().n_neighbors
+        if neighbors is not None and neighbors.n_neighbors >= n_neighbors:
+            knn = neighbors.knn(n_neighbors)
+            if neighbors.search_index is not None:
+                knn = knn + (neighbors.search_index,)
+        else:
+            knn = umap.umap_.nearest_neighbors(np.asarray(X), n_neighbors, "euclidean", {}, False, None)
+        self.reducers = [umap.UMAP(n_components=n, n_neighbors=n_neighbors, precomputed_knn=knn) for n in dimensions]
+        return [pd.DataFrame(reducer.fit_transform(X)) for reducer in self.reducers]
     
 class computationPaCMAP(DimensionalityReduction):
     """
     PaCMAP computation class.
     """
-    def compute(self, X, n, default=True, *args):
+    def __reducer(self, n, default, *args, **pairs):
         if default:
-            reducer = pacmap.PaCMAP(n_components=n, random_state=9)
-        else:
-            reducer = pacmap.PaCMAP(
-                n_components=n,
-                n_neighbors=args[0],
-                MN_ratio=args[1],
-                FP_ratio=args[2],
-                random_state=9,
-            )
+            return pacmap.PaCMAP(n_components=n, random_state=9, **pairs)
+        return pacmap.PaCMAP(
+            n_components=n,
+            n_neighbors=args[0],
+            MN_ratio=args[1],
+            FP_ratio=args[2],
+            random_state=9,
+            **pairs,
+        )
+
+    def compute(self, X, n, default=True, *args):
+        reducer = self.__reducer(n, default, *args)
         embedding = reducer.fit_transform(X, init="pca")
         embedding = pd.DataFrame(embedding)
         return embedding
+
+    def compute_multi(self, X, dimensions, default=True, *args, neighbors=None):
+        # the pairs (neighbors, mid-near and further points) are sampled once and shared between the dimensions
+        reducer = self.__reducer(dimensions[0], default, *args)
+        if neighbors is not None and reducer.n_neighbors is not None and neighbors.n_neighbors > reducer.n_neighbors:
+            reducer.pair_neighbors = neighbors.pairs(reducer.n_neighbors)
+        embeddings = [pd.DataFrame(reducer.fit_transform(X, init="pca"))]
+        self.reducers = [reducer]
+        pairs = {"pair_neighbors": reducer.pair_neighbors, "pair_MN": reducer.pair_MN, "pair_FP": reducer.pair_FP}
+        for n in dimensions[1:]:
+            self.reducers.append(self.__reducer(n, default, *args, **pairs))
+            embeddings.append(pd.DataFrame(self.reducers[-1].fit_transform(X, init="pca")))
+        return embeddings
     
 def DimensionalityReductionChooser(method):
     """
@@ -229,13 +519,389 @@ def DimensionalityReductionChooser(method):
         return computationPaCMAP()
 
 
-def initialize_dim_red_EV(X, default_projection):
-    dim_red = DimensionalityReductionChooser(method=default_projection)
-    return dim_red.compute(X, 2, True), dim_red.compute(X, 3, True)
+def compute_projection(X, method, *args, cache=None, space=None, explanation=None, neighbors=None):
+    """
+    Function that computes the 2D and 3D projections of X with a dimensionality reduction method.
+    If a cache is given, the projections are loaded from it when they have already been computed on the same data with the same parameters.
+
+    Parameters
+    ----------
+    X : pandas dataframe
+        The data to project.
+    method : str
+        The name of the method to use ("PCA", "t-SNE", "UMAP" or "PaCMAP").
+    *args
+        The parameters of the method (for PaCMAP : n_neighbors, MN_ratio and FP_ratio). If empty, the default parameters are used.
+    cache : DiskCache object
+        The cache in which the projections are stored.
+    space : str
+        The space of the data ("VS" or "ES"), stored with the projections.
+    explanation : str
+        The explanation projected, for the ES.
+    neighbors : NeighborIndex object
+        The nearest neighbors of the observations of X, shared between the methods.
+
+    Returns
+    -------
+    Projection object
+        The 2D and the 3D projections.
+    """
+    dim_red = DimensionalityReductionChooser(method=method)
+    if cache is not None:
+        tags = {"kind": "projection", "space": space, "explanation": explanation, "method": method, "data": fingerprint_data(X)}
+        # the projections computed with the shared neighbors are not the same as with the own search of the method
+        key = make_key(tags, list(args), neighbors is not None)
+        values = cache.get(key)
+        if values is not None:
+            return Projection([values[:, :2], values[:, 2:]], X)
+    projections = Projection(dim_red.compute_multi(X, [2, 3], len(args) == 0, *args, neighbors=neighbors), X, dim_red.reducers)
+    if cache is not None:
+        cache.set(key, np.hstack([projections[0].values, projections[1].values]), **tags)
+    return projections
+
+class Projection():
+    """
+    The 2D and 3D projections of a dataset, with the reducers fitted on it : new observations can be placed in the projections without computing them again.
+    A Projection behaves like the list [2D, 3D] of its embeddings.
+
+    Attributes
+    ----------
+    embeddings : list
+        The projections, as pandas dataframes.
+    X : numpy array
+        The projected data.
+    reducers : list
+        The fitted reducers, one for each embedding. None if they are not available (t-SNE, or a projection loaded from the cache) : the new observations are then placed by interpolation between their nearest neighbors.
+    """
+    N_INTERPOLATION = 5
+
+    def __init__(self, embeddings, X, reducers=None, n_fitted=None):
+        """
+        Constructor of the class Projection.
+
+        Parameters
+        ----------
+        embeddings : list
+            The projections, as pandas dataframes.
+        X : pandas dataframe
+            The projected data.
+        reducers : list
+            The fitted reducers, one for each embedding.
+        n_fitted : int
+            The number of observations (the first ones of X) the reducers were fitted on. By default, all of them.
+        """
+        self.embeddings = [pd.DataFrame(embedding) for embedding in embeddings]
+        self.X = np.asarray(X, dtype=float)
+        self.reducers = reducers
+        self.n_fitted = len(self.X) if n_fitted is None else n_fitted
+        self.__neighbors = None
+
+    def __getitem__(self, i):
+        return self.embeddings[i]
 
-def initialize_dim_red_EE(EXP, default_projection):
-    dim_red = DimensionalityReductionChooser(method=default_projection)
-    return dim_red.compute(EXP, 2, True), dim_red.compute(EXP, 3, True)
+    def __len__(self):
+        return len(self.embeddings)
+
+    def __iter__(self):
+        return iter(self.embeddings)
+
+    def transform(self, X_new) -> list:
+        """
+        Function that places new observations in the projections.
+
+        Parameters
+        ----------
+        X_new : pandas dataframe
+            The new observations, with the same columns as the projected data.
+
+        Returns
+        -------
+        list
+            The coordinates of the new observations in each projection, as pandas dataframes.
+        """
+        X_new = np.asarray(X_new, dtype=float)
+        if self.reducers is not None:
+            try:
+                return [pd.DataFrame(self.__transform(reducer, X_new)[:, :embedding.shape[1]]) for reducer, embedding in zip(self.reducers, self.embeddings)]
+            except (NotImplementedError, ValueError):
+                # for example UMAP fitted on neighbors without their search index
+                pass
+        return self.__interpolate(X_new)
+
+    def __transform(self, reducer, X_new):
+        if isinstance(reducer, pacmap.PaCMAP):
+            return np.asarray(reducer.transform(X_new, basis=self.X[:self.n_fitted]))
+        return np.asarray(reducer.transform(X_new))
+
+    def __interpolate(self, X_new):
+        # a new observation is placed at the mean of the positions of its nearest neighbors, weighted by the inverse of their distances
+        if self.__neighbors is None:
+            self.__neighbors = NearestNeighbors(n_neighbors=min(Projection.N_INTERPOLATION, len(self.X))).fit(self.X)
+        distances, indices = self.__neighbors.kneighbors(X_new)
+        weights = 1 / np.maximum(distances, 1e-12)
+        weights /= weights.sum(axis=1, keepdims=True)
+        return [pd.DataFrame(np.einsum("ij,ijk->ik", weights, embedding.values[indices])) for embedding in self.embeddings]
+
+    def append(self, X_new):
+        """
+        Function that returns the projections completed with new observations, placed with `transform`.
+
+        Parameters
+        ----------
+        X_new : pandas dataframe
+            The new observations.
+
+        Returns
+        -------
+        Projection object
+            The projections of the previous and of the new observations.
+        """
+        new = self.transform(X_new)
+        embeddings = [pd.concat([embedding, positions], ignore_index=True) for embedding, positions in zip(self.embeddings, new)]
+        return Projection(embeddings, np.vstack([self.X, np.asarray(X_new, dtype=float)]), self.reducers, self.n_fitted)
+
+class ProjectionScheduler():
+    """
+    Computes the projections in pools of threads, so that the interface is not frozen during the computation.
+    Only the last projection asked for a space ("VS" or "ES") is displayed : the requests that are still waiting are cancelled, and the results of the ones already running are dropped.
+    Each space has its own pool, and the projections computed in advance (prefetch) have their own thread : a projection asked by the user never waits for a prefetch, nor for the other space.
+
+    Attributes
+    ----------
+    max_workers : int
+        The number of projections of a space computed at the same time.
+    """
+    def __init__(self, max_workers=1):
+        """
+        Constructor of the class ProjectionScheduler.
+
+        Parameters
+        ----------
+        max_workers : int
+            The number of projections of a space computed at the same time.
+        """
+        self.max_workers = max_workers
+        self.__executors = {}
+        self.__prefetch_executor = ThreadPoolExecutor(max_workers=1)
+        # reentrant : the callbacks of a cancelled future are called by cancel()
+        self.__lock = threading.RLock()
+        self.__generation = {}
+        # computations not finished yet, by key : {"space", "function", "future", "prefetch", "waiting"}
+        # waiting : the requests for this key, as (generation, on_done, prefetch)
+        self.__pending = {}
+        self.__closed = False
+
+    def submit(self, space, key, function, on_done, prefetch=False):
+        """
+        Function that asks for a projection.
+
+        Parameters
+        ----------
+        space : str
+            The space of the projection ("VS" or "ES").
+        key : tuple
+            Identifies the projection : a projection already asked is not computed twice.
+        function : callable
+            Computes the projection.
+        on_done : callable
+            Called with the projection once it is computed, if no other projection has been asked for the same space in the meantime.
+        prefetch : bool
+            If True, the projection is computed in advance : it does not replace the last projection asked, and `on_done` is always called.
+
+        Returns
+        -------
+        Future
+            The future of the computation.
+        """
+        with self.__lock:
+            if not prefetch:
+                self.__generation[space] = self.__generation.get(space, 0) + 1
+                # the projections of this space asked before and not started yet are not needed anymore
+                for other, entry in list(self.__pending.items()):
+                    if entry["space"] == space and not entry["prefetch"] and other != key:
+                        entry["future"].cancel()
+            request = (self.__generation.get(space, 0), on_done, prefetch)
+            entry = self.__pending.get(key)
+            if entry is None:
+                return self.__start(space, key, function, prefetch, [request])["future"]
+            entry["waiting"].append(request)
+            if entry["prefetch"] and not prefetch:
+                # a prefetch not started yet is moved to the pool of the space, with the requests waiting for it
+                waiting, entry["waiting"] = entry["waiting"], []
+                if entry["future"].cancel():
+                    entry = self.__start(space, key, function, False, waiting)
+                else:
+                    entry["waiting"] = waiting
+            return entry["future"]
+
+    def __start(self, space, key, function, prefetch, waiting):
+        if prefetch:
+            executor = self.__prefetch_executor
+        else:
+            if space not in self.__executors:
+                self.__executors[space] = ThreadPoolExecutor(max_workers=self.max_workers)
+            executor = self.__executors[space]
+        entry = {"space": space, "function": function, "prefetch": prefetch, "waiting": waiting}
+        self.__pending[key] = entry
+        entry["future"] = executor.submit(function)
+        entry["future"].add_done_callback(lambda f: self.__done(key, entry))
+        return entry
+
+    def __done(self, key, entry):
+        future = entry["future"]
+        with self.__lock:
+            if self.__pending.get(key) is entry:
+                del self.__pending[key]
+            waiting, entry["waiting"] = entry["waiting"], []
+            if future.cancelled():
+                # the prefetches waiting for a cancelled request are computed anyway
+                prefetches = [request for request in waiting if request[2]]
+                if len(prefetches) > 0 and key not in self.__pending and not self.__closed:
+                    self.__start(entry["space"], key, entry["function"], True, prefetches)
+                return
+        if future.exception() is not None:
+            print("AntakIA ERROR : the projection could not be computed (" + str(future.exception()) + ")")
+            return
+        # compared and published under the lock : a newer request cannot be published before an older one
+        with self.__lock:
+            if self.__closed:
+                return
+            generation = self.__generation.get(entry["space"], 0)
+            for request_generation, on_done, prefetch in waiting:
+                if prefetch or request_generation == generation:
+                    on_done(future.result())
+
+    def shutdown(self):
+        """
+        Function that stops the computations : the projections not started yet are cancelled, and the results of the ones already running are dropped.
+        """
+        with self.__lock:
+            self.__closed = True
+        for executor in list(self.__executors.values()) + [self.__prefetch_executor]:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+class SkopeTask():
+    """
+    Finds the rules of a selection with the skope-rules algorithm in a separate thread, the value space and the explanation space being fitted at the same time (see `Potato.fitSkope`).
+    Like `LongTask`, the progress is given by `progress_widget` and `text_widget`. The task can be cancelled : its result is dropped, but the fits already started are not interrupted (a cancelled task still uses the CPU until they end).
+
+    Attributes
+    ----------
+    potato : Potato object
+        The selection.
+    explanation : str
+        The name of the explanation to use.
+    p, r : float
+        The minimum precision and recall of the rules.
+    rule_engine : str
+        The rule learner, "skope" or "native" (see `Potato.fitSkope`).
+    mask : numpy array
+        The selection when the task was created : the rules are found for it.
+    value : dict
+        The result of `Potato.fitSkope`, once computed.
+    """
+    def __init__(self, potato, explanation, p=0.7, r=0.7, rule_engine="skope"):
+        self.potato = potato
+        self.explanation = explanation
+        self.p = p
+        self.r = r
+        self.rule_engine = rule_engine
+        self.mask = potato.mask.copy()
+
+        self.progress = 0
+        self.progress_widget = v.Textarea(v_model=0)
+        self.text_widget = v.Textarea(v_model=None)
+        self.value = None
+        self.thread = None
+        self.cancelled = False
+        self.__fitted_spaces = set()
+        self.__link = None
+        self.__on_status = None
+
+    def compute(self):
+        """
+        Method that finds the rules.
+        """
+        self.text_widget.v_model = "Searching the rules..."
+        self.value = self.potato.fitSkope(self.explanation, self.p, self.r, self.mask.astype(int), self.__fitted, self.rule_engine)
+        self.text_widget.v_model = "Done"
+        return self.value
+
+    def __fitted(self, space):
+        # called from the two threads of the fits : the progress is derived from the spaces done
+        self.__fitted_spaces.add(space)
+        self.progress = 50 * len(self.__fitted_spaces)
+        self.progress_widget.v_model = self.progress
+        self.text_widget.v_model = "Rules found in the " + space
+
+    def compute_in_thread(self, on_done=None, on_error=None):
+        """
+        Method that finds the rules in a separate thread.
+
+        Parameters
+        ----------
+        on_done : callable
+            Called with the result, if the task has not been cancelled in the meantime.
+        on_error : callable
+            Called with the exception, if the rules could not be found.
+        """
+        def run():
+            try:
+                value = self.compute()
+            except Exception as e:
+                print("AntakIA ERROR : the rules could not be found (" + str(e) + ")")
+                if on_error is not None:
+                    on_error(e)
+                return
+            if on_done is not None and not self.cancelled:
+                on_done(value)
+
+        self.thread = threading.Thread(target=run)
+        self.thread.start()
+
+    def watch(self, progress_widget, on_status):
+        """
+        Method that shows the progress of the task in the interface, until `unwatch` is called.
+
+        Parameters
+        ----------
+        progress_widget : widget
+            The widget whose v_model follows the progress.
+        on_status : callable
+            Called with each new status text.
+        """
+        self.unwatch()
+        self.__link = widgets.jslink((progress_widget, "v_model"), (self.progress_widget, "v_model"))
+        self.__on_status = lambda change: on_status(change["new"])
+        self.text_widget.observe(self.__on_status, "v_model")
+
+    def unwatch(self):
+        """
+        Method that detaches the task from the interface (see `watch`).
+        """
+        if self.__link is not None:
+            self.__link.unlink()
+            self.text_widget.unobserve(self.__on_status, "v_model")
+            self.__link, self.__on_status = None, None
+
+    def cancel(self):
+        """
+        Method that cancels the task : its result will not be given, and it is detached from the interface. The fits already running are not stopped.
+        """
+        self.cancelled = True
+        self.unwatch()
+
+    def isStale(self, potato) -> bool:
+        """
+        Method that tells if the result of the task is out of date : the task was cancelled, or the selection is not the same anymore.
+        """
+        return self.cancelled or potato is not self.potato or not np.array_equal(potato.mask, self.mask)
+
+def initialize_dim_red_VS(X, default_projection, cache=None):
+    return compute_projection(X, default_projection, cache=cache, space="VS")
+
+def initialize_dim_red_ES(EXP, default_projection, cache=None, explanation=None):
+    return compute_projection(EXP, default_projection, cache=cache, space="ES", explanation=explanation)
 
 def function_score(y, y_chap):
     y = np.array(y)
@@ -243,57 +909,80 @@ def function_score(y, y_chap):
     return round(np.sqrt(sum((y - y_chap) ** 2) / len(y)), 3)
 
 def update_figures(gui, exp, projEV, projEE):
-    with gui.fig1.batch_update():
-        gui.fig1.data[0].x, gui.fig1.data[0].y  = gui.dim_red['EV'][projEV][0][0], gui.dim_red['EV'][projEV][0][1]
-    with gui.fig2.batch_update():
-        gui.fig2.data[0].x, gui.fig2.data[0].y = gui.dim_red['EE'][exp][projEE][0][0], gui.dim_red['EE'][exp][projEE][0][1]
-    with gui.fig1_3D.batch_update():
-        gui.fig1_3D.data[0].x, gui.fig1_3D.data[0].y, gui.fig1_3D.data[0].z = gui.dim_red['EV'][projEV][1][0], gui.dim_red['EV'][projEV][1][1], gui.dim_red['EV'][projEV][1][2]
-    with gui.fig2_3D.batch_update():
-        gui.fig2_3D.data[0].x, gui.fig2_3D.data[0].y, gui.fig2_3D.data[0].z = gui.dim_red['EE'][exp][projEE][1][0], gui.dim_red['EE'][exp][projEE][1][1], gui.dim_red['EE'][exp][projEE][1][2]
+    # the projections still being computed are displayed once they are ready
+    if gui.dim_red['VS'][projEV] is not None:
+        gui.scatters["fig1"].setCoordinates(gui.dim_red['VS'][projEV][0])
+        gui.scatters["fig1_3D"].setCoordinates(gui.dim_red['VS'][projEV][1])
+    if gui.dim_red['ES'][exp][projEE] is not None:
+        gui.scatters["fig2"].setCoordinates(gui.dim_red['ES'][exp][projEE][0])
+        gui.scatters["fig2_3D"].setCoordinates(gui.dim_red['ES'][exp][projEE][1])
+
+def explanation_column(X, Exp, column):
+    """
+    Function that returns the column of the explanations linked to a feature.
+    The columns of the explanations are in the same order as the features (for example "MedInc_shap" or "MedInc_lime" for "MedInc").
+
+    Parameters
+    ----------
+    X : pandas dataframe
+        The dataframe containing the features.
+    Exp : pandas dataframe
+        The dataframe containing the explanations.
+    column : str
+        The name of the feature.
+    """
+    return Exp.columns[list(X.columns).index(column)]
+
+def beeswarm_offsets(values, y, nombre_div=60):
+    """Return the vertical offsets of the points of a beeswarm plot.
+
+    The values are cut in `nombre_div` bins of the same width. In each bin, the points are ranked by y (ties in the order of the points) : the offset of the point of rank r is r if r is even, -r otherwise.
+
+    Parameters
+    ---------
+    values : numpy array
+        The values (x-axis) of the points.
+    y : numpy array
+        The values used to rank the points in a bin.
+    nombre_div : int
+        The number of bins.
+
+    Returns
+    -------
+    numpy array
+        The offset of each point (0 for the missing values).
+    """
+    values = np.asarray(values, dtype=float)
+    y = np.asarray(y)
+    offsets = np.zeros(len(values), dtype=int)
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid) == 0:
+        return offsets
+    edges = np.linspace(values[valid].min(), values[valid].max(), nombre_div + 1)
+    # a value on an edge belongs to the bin below it
+    bins = np.clip(np.searchsorted(edges, values[valid], "left") - 1, 0, nombre_div - 1)
+    order = np.lexsort((valid, y[valid], bins))
+    sorted_bins = bins[order]
+    rank = np.arange(len(order)) - np.searchsorted(sorted_bins, sorted_bins, "left")
+    offsets[valid[order]] = np.where(rank % 2 == 0, rank, -rank)
+    return offsets
+
 
 def function_beeswarm_shap(gui, exp, nom_colonne):
     X = gui.atk.dataset.X
     Exp = gui.atk.explain[exp]
     y = gui.atk.dataset.y_pred
-    
+
     # redefinition de la figure beeswarm de shap
-    def positions_ordre_croissant(lst):
-        positions = list(range(len(lst)))  # Create a list of initial positions
-        positions.sort(key=lambda x: lst[x])
-        l = []
-        for i in range(len(positions)):
-            l.append(positions.index(i))  # Sort positions by list items
-        return l
-    
-    nom_colonne_shap = nom_colonne + "_shap"
-    y_histo_shap = [0] * len(Exp)
-    nombre_div = 60
-    garde_indice = []
-    garde_valeur_y = []
-    for i in range(nombre_div):
-        garde_indice.append([])
-        garde_valeur_y.append([])
-    liste_scale = np.linspace(
-        min(Exp[nom_colonne_shap]), max(Exp[nom_colonne_shap]), nombre_div + 1
-    )
-    for i in range(len(Exp)):
-        for j in range(nombre_div):
-            if (
-                Exp[nom_colonne_shap][i] >= liste_scale[j]
-                and Exp[nom_colonne_shap][i] <= liste_scale[j + 1]
-            ):
-                garde_indice[j].append(i)
-                garde_valeur_y[j].append(y[i])
-                break
-    for i in range(nombre_div):
-        l = positions_ordre_croissant(garde_valeur_y[i])
-        for j in range(len(garde_indice[i])):
-            ii = garde_indice[i][j]
-            if l[j] % 2 == 0:
-                y_histo_shap[ii] = l[j]
-            else:
-                y_histo_shap[ii] = -l[j]
+    nom_colonne_shap = explanation_column(X, Exp, nom_colonne)
+    # the offsets only depend on the explanations of the column and on the predictions : they are kept under their fingerprints
+    key = (exp, nom_colonne, fingerprint_data(Exp[nom_colonne_shap]), fingerprint_data(y))
+    cache = getattr(gui, "beeswarm_cache", {})
+    offsets = cache.get(key)
+    if offsets is None:
+        offsets = beeswarm_offsets(Exp[nom_colonne_shap].to_numpy(), y.to_numpy())
+        cache[key] = offsets
+    y_histo_shap = offsets.tolist()
     marker_shap = dict(
         size=4,
         opacity=0.6,
@@ -9,6 +9,7 @@ from IPython.display import display
 from sklearn.preprocessing import StandardScaler
 
 from antakia import gui_elements
+from antakia.rules import ColumnIndex
 
 import time
 
@@ -26,6 +27,8 @@ class Dataset():
         The dataframe containing the entire dataset, in order for the explanations to be computed.
     X_scaled : pandas dataframe
         The dataframe containing the scaled dataset.
+    scaler : StandardScaler object
+        The scaler fitted on the initial dataset. The observations appended later are scaled with it, so that the scaled values of the others do not change.
     y : pandas series
         The series containing the target values.
     model : model object
@@ -72,7 +75,8 @@ class Dataset():
         self.X_all = X
         self.model = model
         self.y = y
-        self.X_scaled = pd.DataFrame(StandardScaler().fit_transform(X))
+        self.scaler = StandardScaler().fit(X)
+        self.X_scaled = pd.DataFrame(self.scaler.transform(X))
         self.X_scaled.columns = X.columns
 
         self.y_pred = pd.Series(self.model.predict(self.X))
@@ -88,6 +92,9 @@ class Dataset():
 
         self.long, self.lat = None, None
 
+        # sorted columns for the interval queries of the rules, built when they are asked
+        self.__sorted_columns = {}
+
         for name in ['longitude', 'Longitude', 'Long', 'long']:
             if name in self.X.columns:
                 self.long = name
@@ -139,6 +146,80 @@ class Dataset():
             self.y = self.y.iloc[self.frac_indexes].reset_index(drop=True)
         self.fraction = p
         self.X.reset_index(drop=True, inplace=True)
+        self.invalidateSortedColumns()
+
+    def append(self, X:pd.DataFrame, y:pd.Series = None):
+        """
+        Appends new observations to the dataset. They are added at the end of `X_all` and `X` (even if the dataset has been reduced with `frac`), so the existing observations keep their position.
+
+        Parameters
+        ---------
+        X : pandas dataframe
+            The new observations, with the same columns as the dataset.
+        y : pandas series
+            The target values of the new observations. Mandatory if the dataset has target values.
+        """
+        if self.y is not None and y is None:
+            raise ValueError("You must provide the target values of the new observations")
+        X = X.copy()
+        X.columns = [X.columns[i].replace(" ", "_") for i in range(len(X.columns))]
+        X = X.reset_index(drop=True)
+        new_indexes = pd.RangeIndex(len(self.X_all), len(self.X_all) + len(X))
+        self.X_all = pd.concat([self.X_all, X.set_axis(self.X_all.columns, axis=1)], ignore_index=True)
+        self.X = pd.concat([self.X, X.set_axis(self.X.columns, axis=1)], ignore_index=True)
+        self.frac_indexes = self.frac_indexes.append(new_indexes)
+        # the scaler is not fitted again : the projections and the neighbors of the previous observations stay valid
+        X_scaled = pd.DataFrame(self.scaler.transform(X.set_axis(self.X_all.columns, axis=1)), columns=self.X.columns)
+        self.X_scaled = pd.concat([self.X_scaled, X_scaled], ignore_index=True)
+        self.y_pred = pd.concat([self.y_pred, pd.Series(self.model.predict(X))], ignore_index=True)
+        if self.y is not None:
+            self.y = pd.concat([self.y, pd.Series(y).reset_index(drop=True)], ignore_index=True)
+        self.invalidateSortedColumns()
+
+    def rowHashes(self) -> np.ndarray:
+        """
+        Returns a hash of each observation of `X`, used to know which observations have changed.
+
+        Returns
+        -------
+        numpy array
+            The hashes of the rows of `X`.
+        """
+        return pd.util.hash_pandas_object(self.X, index=False).values
+
+    def sortedColumn(self, column:str) -> ColumnIndex:
+        """
+        Returns the sorted index of a column of `X`, to find the observations in an interval without scanning the column. It is built the first time it is asked.
+
+        Parameters
+        ---------
+        column : str
+            The name of the column.
+
+        Returns
+        -------
+        ColumnIndex object
+            The sorted index of the column.
+        """
+        index = self.__sorted_columns.get(column)
+        if index is None or len(index) != len(self.X):
+            index = ColumnIndex(self.X[column])
+            self.__sorted_columns[column] = index
+        return index
+
+    def invalidateSortedColumns(self, column:str = None):
+        """
+        Forgets the sorted index of a column (of all the columns if None), after the column has changed.
+
+        Parameters
+        ---------
+        column : str
+            The name of the column.
+        """
+        if column is None:
+            self.__sorted_columns = {}
+        else:
+            self.__sorted_columns.pop(column, None)
 
     def setLongLat(self, long:str, lat:str):
         """
@@ -203,12 +284,15 @@ class Dataset():
 
         def changement_names(widget, event, data):
             i = widget.value-1
+            self.invalidateSortedColumns(self.X.columns[i])
+            self.invalidateSortedColumns(widget.v_model)
             self.X = self.X.rename(columns={self.X.columns[i]: widget.v_model})
 
         def changement_type(widget, event, data):
             i = widget.value-1
             widget2 = liste_slides[i].children[0].children[-1].children[1].children[0]
             try :
+                self.invalidateSortedColumns(self.X.columns[i])
                 self.X = self.X.astype({self.X.columns[i]: widget2.v_model})
             except:
                 print("The type of the column " + self.X.columns[i] + " cannot be changed to " + widget2.v_model)
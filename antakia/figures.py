@@ -0,0 +1,236 @@
+"""
+Figures module for the antakia package : the state of the scatter plots of the GUI (coordinates and markers of the observations).
+"""
+
+import numpy as np
+
+# above this number of observations, the GUI switches to its large-data mode
+MAX_POINTS = 50000
+
+
+def subsample(coordinates, max_points, grid=100, seed=9):
+    """Return a subsample of the observations that preserves the density of the scatter plot.
+
+    The plane is cut in a grid : each cell keeps a number of observations proportional to its count, and at least one, so that isolated observations stay visible.
+
+    Parameters
+    ---------
+    coordinates : numpy array
+        The coordinates of the observations, shape (n, 2) or (n, 3). Only the first two are used.
+    max_points : int
+        The approximate size of the subsample.
+    grid : int
+        The number of cells along each axis.
+    seed : int
+        The seed of the random choice inside the cells.
+
+    Returns
+    -------
+    numpy array
+        The sorted indices of the observations kept.
+    """
+    n = len(coordinates)
+    if n <= max_points:
+        return np.arange(n)
+    xy = np.asarray(coordinates, dtype=float)[:, :2]
+    mins = xy.min(axis=0)
+    span = np.ptp(xy, axis=0)
+    span[span == 0] = 1
+    cells = np.minimum(((xy - mins) / span * grid).astype(int), grid - 1)
+    cell = cells[:, 0] * grid + cells[:, 1]
+    # random order inside each cell
+    order = np.random.default_rng(seed).permutation(n)
+    order = order[np.argsort(cell[order], kind="stable")]
+    sorted_cells = cell[order]
+    rank = np.arange(n) - np.searchsorted(sorted_cells, sorted_cells, "left")
+    quota = np.maximum(1, np.bincount(cell, minlength=grid * grid) * max_points // n)
+    return np.sort(order[rank < quota[sorted_cells]])
+
+
+def encode(values, uniform_as_scalar=False):
+    """Return the values in their most compact form for plotly : the numbers as numpy arrays of the smallest type (sent as binary buffers to the front-end), the other values as lists.
+
+    Parameters
+    ---------
+    values : list, numpy array or scalar
+        The values of a marker.
+    uniform_as_scalar : bool
+        If True, an array whose values are all the same is replaced by this value (for the opacity or the size of the markers).
+
+    Returns
+    -------
+    numpy array, list or scalar
+        The encoded values.
+    """
+    if values is None or np.isscalar(values):
+        return values
+    array = np.asarray(values)
+    if array.dtype.kind not in "biuf" or array.ndim != 1:
+        return array.tolist()
+    if uniform_as_scalar and len(array) > 0 and np.all(array == array[0]):
+        return array[0].item()
+    if array.dtype.kind == "b":
+        return array.astype(np.uint8)
+    if array.dtype.kind in "iu" and len(array) > 0:
+        return array.astype(np.result_type(np.min_scalar_type(array.min()), np.min_scalar_type(array.max())))
+    return array.astype(np.float32)
+
+
+def points_in_polygon(x, y, xs, ys):
+    """Return the mask of the points (x, y) that are inside the polygon of vertices (xs, ys) (even-odd rule).
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    inside = np.zeros(len(x), dtype=bool)
+    j = len(xs) - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for i in range(len(xs)):
+            crosses = ((ys[i] > y) != (ys[j] > y)) & (x < (xs[j] - xs[i]) * (y - ys[i]) / (ys[j] - ys[i]) + xs[i])
+            inside ^= crosses
+            j = i
+    return inside
+
+
+class FigureState():
+    """
+    The state of a scatter plot of the GUI : the coordinates and the markers of all the observations.
+    In large-data mode (more than `max_points` observations), only a subsample of the observations is sent to the figure : a density-preserving one at overview zoom, then the observations of the viewport when the user zooms.
+    Only the values that changed are sent to the figure, in their compact form (see `encode`).
+
+    Attributes
+    ----------
+    figure : FigureWidget object
+        The figure, with one scatter trace.
+    max_points : int
+        The maximum number of observations sent to the figure.
+    coordinates : numpy array
+        The coordinates of all the observations.
+    markers : dict
+        The markers of all the observations ("color", "opacity", "customdata"...) : arrays of length n, or scalars.
+    displayed : numpy array
+        The indices of the observations displayed. None if all of them are.
+    """
+    def __init__(self, figure, max_points: int = MAX_POINTS):
+        """
+        Constructor of the class FigureState.
+
+        Parameters
+        ----------
+        figure : FigureWidget object
+            The figure, with one scatter trace.
+        max_points : int
+            The maximum number of observations sent to the figure.
+        """
+        self.figure = figure
+        self.max_points = max_points
+        self.coordinates = None
+        self.markers = {}
+        self.displayed = None
+        # the values last sent to the figure
+        self.__sent = {}
+
+    @property
+    def large(self) -> bool:
+        return self.coordinates is not None and len(self.coordinates) > self.max_points
+
+    def setCoordinates(self, coordinates):
+        """
+        Function that sets the coordinates of the observations (after a change of projection).
+
+        Parameters
+        ----------
+        coordinates : pandas dataframe or numpy array
+            The coordinates, shape (n, 2) or (n, 3).
+        """
+        self.coordinates = np.asarray(coordinates, dtype=float)
+        self.displayed = subsample(self.coordinates, self.max_points) if self.large else None
+        self.__push(True, self.markers.keys())
+
+    def setMarkers(self, **markers):
+        """
+        Function that sets markers of the observations.
+
+        Parameters
+        ----------
+        **markers
+            The markers : "color", "opacity", "symbol"... of the marker of the trace, or "customdata" of the trace itself.
+        """
+        self.markers.update(markers)
+        self.__push(False, markers.keys())
+
+    def zoom(self, xrange=None, yrange=None):
+        """
+        Function that displays the observations of the viewport (in large-data mode only).
+
+        Parameters
+        ----------
+        xrange, yrange : list
+            The ranges of the axes. If None, all the observations are in the viewport.
+        """
+        if not self.large:
+            return
+        in_view = np.ones(len(self.coordinates), dtype=bool)
+        for axis, bounds in enumerate([xrange, yrange]):
+            if bounds is not None:
+                in_view &= (self.coordinates[:, axis] >= min(bounds)) & (self.coordinates[:, axis] <= max(bounds))
+        indexes = np.flatnonzero(in_view)
+        self.displayed = indexes[subsample(self.coordinates[indexes], self.max_points)]
+        self.__push(True, self.markers.keys())
+
+    def selected(self, points, selector=None) -> np.ndarray:
+        """
+        Function that returns the indices, in the whole dataset, of the observations selected on the figure.
+        In large-data mode, the lasso (or the box) is applied to all the observations, including the ones not displayed.
+
+        Parameters
+        ----------
+        points : Points object
+            The points selected, given by plotly.
+        selector : LassoSelector or BoxSelector object
+            The selector used, given by plotly.
+
+        Returns
+        -------
+        numpy array
+            The indices of the selected observations.
+        """
+        if not self.large:
+            return np.asarray(points.point_inds, dtype=int)
+        x, y = self.coordinates[:, 0], self.coordinates[:, 1]
+        if getattr(selector, "type", None) == "lasso":
+            return np.flatnonzero(points_in_polygon(x, y, selector.xs, selector.ys))
+        if getattr(selector, "type", None) == "box":
+            (x0, x1), (y0, y1) = sorted(selector.xrange), sorted(selector.yrange)
+            return np.flatnonzero((x >= x0) & (x <= x1) & (y >= y0) & (y <= y1))
+        return self.displayed[np.asarray(points.point_inds, dtype=int)]
+
+    def __shown(self, values):
+        # the part of a marker array sent to the figure
+        if self.displayed is None or values is None or np.isscalar(values) or len(values) != len(self.coordinates):
+            return values
+        return np.asarray(values)[self.displayed]
+
+    def __changed(self, key, value):
+        # True if the value is different from the one already sent (and then remembers it)
+        sent = self.__sent.get(key, self)
+        if type(sent) == type(value) and (np.array_equal(sent, value) if isinstance(value, np.ndarray) else sent == value):
+            return False
+        self.__sent[key] = value
+        return True
+
+    def __push(self, coordinates, keys):
+        updates = {}
+        if coordinates and self.coordinates is not None:
+            for axis, name in enumerate(["x", "y", "z"][:self.coordinates.shape[1]]):
+                updates[name] = encode(self.__shown(self.coordinates[:, axis]))
+        for key in keys:
+            updates[key] = encode(self.__shown(self.markers[key]), key in ["opacity", "size"])
+        updates = {key: value for key, value in updates.items() if self.__changed(key, value)}
+        if len(updates) == 0:
+            return
+        trace = self.figure.data[0]
+        with self.figure.batch_update():
+            for key, value in updates.items():
+                if key in ["x", "y", "z", "customdata"]:
+                    setattr(trace, key, value)
+                else:
+                    setattr(trace.marker, key, value)
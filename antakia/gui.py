@@ -1,7 +1,6 @@
 # Datascience imports
 import pandas as pd
 import numpy as np
-from skrules import SkopeRules
 from sklearn.manifold import TSNE
 from sklearn.decomposition import PCA
 from sklearn import linear_model
@@ -38,6 +37,8 @@ from antakia.utils import _function_models as function_models
 from antakia.utils import _conflict_handler as conflict_handler
 from antakia.potato import Potato
 from antakia import compute
+from antakia.figures import FigureState, MAX_POINTS
+from antakia.rules import positions_mask
 import antakia.gui_elements as gui_elements
 
 
@@ -59,6 +60,7 @@ class GUI():
         explanation: str = None,
         projection: str = "PaCMAP",
         sub_models: list = None,
+        max_points: int = MAX_POINTS,
     ):
         """Function that creates the interface.
 
@@ -72,6 +74,8 @@ class GUI():
             The default projection to display. It can be "PaCMAP", "PCA", "t-SNE" or "UMAP".
         sub_models : list
             The list of sub-models to choose from for each region created by the user. The sub-models must have a predict method.
+        max_points : int
+            Above this number of observations, the figures switch to a large-data mode : they are drawn with WebGL and only show a subsample of the points, completed when zooming.
         """
         if type(explanation) != str and type(explanation) != type(None):
             raise TypeError("explanation must be a string")
@@ -88,6 +92,7 @@ class GUI():
         ]
         
         self.sub_models = sub_models
+        self.max_points = max_points
 
         # Publique :
         self.selection = Potato(self.atk, [])
@@ -109,6 +114,9 @@ class GUI():
         self.dim_red["ES"]["Imported"] = {"PCA": None, "t-SNE": None, "UMAP": None, "PaCMAP": None}
         self.dim_red["ES"]["SHAP"] = {"PCA": None, "t-SNE": None, "UMAP": None, "PaCMAP": None}
         self.dim_red["ES"]["LIME"] = {"PCA": None, "t-SNE": None, "UMAP": None, "PaCMAP": None}    
+        self.__scheduler = compute.ProjectionScheduler() # computes the projections in the background
+        self.__skope_task = None # the search of the rules of the selection running in the background, see compute.SkopeTask
+        self.beeswarm_cache = {} # the beeswarm offsets of each (explanation, feature, fingerprints), see compute.function_beeswarm_shap
 
         if self.__explanation == "SHAP" and type(self.atk.explain["SHAP"]) == type(None) :
             self.__calculus = True
@@ -157,6 +165,65 @@ class GUI():
         """
         self.sub_models = sub_models
 
+    def addObservations(self, n):
+        """Function that places the last n observations of the dataset in the projections already computed, without computing them again.
+        The projections of the explanations that do not cover the new observations (not computed yet for them) are removed.
+
+        Parameters
+        ----------
+        n : int
+            The number of new observations, at the end of the dataset.
+        """
+        for method, projection in self.dim_red["VS"].items():
+            if projection is not None:
+                self.dim_red["VS"][method] = projection.append(self.atk.dataset.X_scaled.iloc[-n:])
+        for exp, projections in self.dim_red["ES"].items():
+            for method, projection in projections.items():
+                if projection is None:
+                    continue
+                if self.atk.explain[exp] is None or len(self.atk.explain[exp]) != len(self.atk.dataset.X) or self.atk.explain[exp].iloc[-n:].isna().any(axis=None):
+                    projections[method] = None
+                else:
+                    projections[method] = projection.append(self.atk.explain[exp].iloc[-n:])
+        if hasattr(self, "fig1"):
+            compute.update_figures(self, self.__explanation, self.__projectionVS, self.__projectionES)
+
+    def __compute_projection(self, space, method, *args, explanation=None):
+        # the 2D and 3D projections of the VS or of an explanation (the current one by default), loaded from the cache of AntakIA if possible
+        if space == "ES" and explanation is None:
+            explanation = self.__explanation
+        X = self.atk.dataset.X_scaled if space == "VS" else self.atk.explain[explanation]
+        # the neighbors of the observations are shared by the methods based on a neighbors graph
+        neighbors = self.atk.getNeighbors(space, explanation) if method != "PCA" else None
+        return compute.compute_projection(X, method, *args, cache=self.atk.cache, space=space, explanation=explanation, neighbors=neighbors)
+
+    def __request_projection(self, space, method, *args, loading=None, prefetch=False):
+        # computes a projection in the background : the figures are updated once it is done, if it is still the last projection asked for this space
+        explanation = self.__explanation if space == "ES" else None
+        projections = self.dim_red["VS"] if space == "VS" else self.dim_red["ES"][explanation]
+
+        def on_done(projection):
+            if prefetch:
+                if projections[method] is None:
+                    projections[method] = projection
+                return
+            projections[method] = projection
+            if loading is not None:
+                loading.layout.visibility = "hidden"
+            compute.update_figures(self, self.__explanation, self.__projectionVS, self.__projectionES)
+
+        if loading is not None and not prefetch:
+            loading.layout.visibility = "visible"
+        self.__scheduler.submit(space, (space, explanation, method) + args, lambda: self.__compute_projection(space, method, *args, explanation=explanation), on_done, prefetch)
+
+    def close(self):
+        """Function that stops the computations of the interface running in the background (projections and rules).
+        """
+        self.__scheduler.shutdown()
+        if self.__skope_task is not None:
+            self.__skope_task.cancel()
+            self.__skope_task = None
+
     def __repr__(self):
         return self.display()
 
@@ -201,15 +268,15 @@ class GUI():
             ].v_model = "Imported explanatory values"
         else :
             if self.__explanation == "SHAP":
-                compute_SHAP = compute.computationSHAP(self.atk.dataset.X, self.atk.dataset.X_all, self.atk.dataset.model)
+                compute_SHAP = compute.computationSHAP(self.atk.dataset.X, self.atk.dataset.X_all, self.atk.dataset.model, cache=self.atk.cache, model_version=self.atk.model_version)
                 widgets.jslink((progress_shap, "v_model"), (compute_SHAP.progress_widget, "v_model"))
                 widgets.jslink((prog_shap.children[2].children[0], "v_model"), (compute_SHAP.text_widget, "v_model"))
-                self.atk.explain["SHAP"] = compute_SHAP.compute()
+                self.atk.setExplanation("SHAP", compute_SHAP.compute())
             elif self.__explanation == "LIME":
-                compute_LIME = compute.computationLIME(self.atk.dataset.X, self.atk.dataset.X_all, self.atk.dataset.model)
+                compute_LIME = compute.computationLIME(self.atk.dataset.X, self.atk.dataset.X_all, self.atk.dataset.model, cache=self.atk.cache, model_version=self.atk.model_version)
                 widgets.jslink((progress_shap, "v_model"), (compute_LIME.progress_widget, "v_model"))
                 widgets.jslink((prog_shap.children[2].children[0], "v_model"), (compute_LIME.text_widget, "v_model"))
-                self.atk.explain["LIME"] = compute_LIME.compute()
+                self.atk.setExplanation("LIME", compute_LIME.compute())
 
         # definition of the default projection
         # base, we take the PaCMAP projection
@@ -217,10 +284,10 @@ class GUI():
         initial_choice_of_projection = ["PCA", "t-SNE", "UMAP", "PaCMAP"].index(self.__projectionVS) # string
 
         prog_red.children[2].children[0].v_model = "Values space... "
-        self.dim_red["VS"][self.__projectionVS] = compute.initialize_dim_red_VS(self.atk.dataset.X_scaled, self.__projectionVS)
+        self.dim_red["VS"][self.__projectionVS] = self.__compute_projection("VS", self.__projectionVS)
         progress_red.v_model = +50
         prog_red.children[2].children[0].v_model = "Values space... Explanatory space..."
-        self.dim_red["ES"][self.__explanation][self.__projectionES] = compute.initialize_dim_red_ES(self.atk.explain[self.__explanation], self.__projectionES)
+        self.dim_red["ES"][self.__explanation][self.__projectionES] = self.__compute_projection("ES", self.__projectionES)
         progress_red.v_model = +50
 
         # once all this is done, the splash screen is removed
@@ -315,21 +382,13 @@ class GUI():
             n_neighbors = slider_param_PaCMAP_neighbours_VS.children[0].v_model
             MN_ratio = slider_param_PaCMAP_mn_ratio_VS.children[0].v_model
             FP_ratio = slider_param_PaCMAP_fp_ratio_VS.children[0].v_model
-            out_loading1.layout.visibility = "visible"
-            dim_red = compute.DimensionalityReductionChooser(method="PaCMAP")
-            self.dim_red['VS']['PaCMAP'] = [dim_red.compute(self.atk.dataset.X_scaled, 2, False, n_neighbors, MN_ratio, FP_ratio), dim_red.compute(self.atk.dataset.X_scaled, 3, False, n_neighbors, MN_ratio, FP_ratio)]
-            out_loading1.layout.visibility = "hidden"
-            compute.update_figures(self, self.__explanation, self.__projectionVS, self.__projectionES)
+            self.__request_projection("VS", "PaCMAP", n_neighbors, MN_ratio, FP_ratio, loading=out_loading1)
 
         validate_params_proj_VS.on_event("click", change_parameters_VS)
 
         def reset_param_VS(*b):
             # reset projection settings
-            out_loading1.layout.visibility = "visible"
-            dim_red = compute.DimensionalityReductionChooser(method="PaCMAP")
-            self.dim_red['VS']['PaCMAP'] = [dim_red.compute(self.atk.dataset.X_scaled, 2), dim_red.compute(self.atk.dataset.X_scaled, 3)]
-            out_loading1.layout.visibility = "hidden"
-            compute.update_figures(self, self.__explanation, self.__projectionVS, self.__projectionES)
+            self.__request_projection("VS", "PaCMAP", loading=out_loading1)
 
         reset_params_proj_VS.on_event("click", reset_param_VS)
 
@@ -394,20 +453,12 @@ class GUI():
             n_neighbors = slider_param_PaCMAP_voisins_ES.children[0].v_model
             MN_ratio = slider_param_PaCMAP_mn_ratio_ES.children[0].v_model
             FP_ratio = slider_param_PaCMAP_fp_ratio_ES.children[0].v_model
-            out_loading2.layout.visibility = "visible"
-            dim_red_compute = compute.DimensionalityReductionChooser(method="PaCMAP")
-            self.dim_red["ES"][self.__explanation][self.__projectionES] = [dim_red_compute.compute(self.atk.explain[self.__explanation], 2, False, n_neighbors, MN_ratio, FP_ratio), dim_red_compute.compute(self.atk.explain[self.__explanation], 3, False, n_neighbors, MN_ratio, FP_ratio)]
-            out_loading2.layout.visibility = "hidden"
-            compute.update_figures(self, self.__explanation, self.__projectionVS, self.__projectionES)
+            self.__request_projection("ES", "PaCMAP", n_neighbors, MN_ratio, FP_ratio, loading=out_loading2)
 
         validate_params_proj_ES.on_event("click", change_params_ES)
 
         def reset_param_ES(*b):
-            out_loading2.layout.visibility = "visible"
-            dim_red_compute = compute.DimensionalityReductionChooser(method="PaCMAP")
-            self.dim_red["ES"][self.__explanation][self.__projectionES] = [dim_red_compute.compute(self.atk.explain[self.__explanation], 2), dim_red_compute.compute(self.atk.explain[self.__explanation], 3)]
-            out_loading2.layout.visibility = "hidden"
-            compute.update_figures(self, self.__explanation, self.__projectionVS, self.__projectionES)
+            self.__request_projection("ES", "PaCMAP", loading=out_loading2)
 
         reset_params_proj_ES.on_event("click", reset_param_ES)
 
@@ -426,59 +477,26 @@ class GUI():
                 color = self.atk.dataset.y_pred
             elif radio_buttons_for_color_choice.v_model == "Selec actuelle":
                 scale = False
-                color = ["grey"] * len(self.atk.dataset.X)
-                for i in range(len(self.selection.indexes)):
-                    color[self.selection.indexes[i]] = "blue"
+                color = np.where(self.selection.mask, "blue", "grey").tolist()
             elif radio_buttons_for_color_choice.v_model == "Résidus":
                 color = self.atk.dataset.y - self.atk.dataset.y_pred
                 color = [abs(i) for i in color]
             elif radio_buttons_for_color_choice.v_model == "Régions":
                 scale = False
-                color = [0] * len(self.atk.dataset.X)
-                for i in range(len(self.atk.dataset.X)):
-                    for j in range(len(self.atk.regions)):
-                        if i in self.atk.regions[j].indexes:
-                            color[i] = j + 1
+                color = (self.atk.getRegionLabels() + 1).tolist()
             elif radio_buttons_for_color_choice.v_model == "Non selec":
                 scale = False
-                color = ["red"] * len(self.atk.dataset.X)
-                if len(self.atk.regions) > 0:
-                    for i in range(len(self.atk.dataset.X)):
-                        for j in range(len(self.atk.regions)):
-                            if i in self.atk.regions[j].indexes:
-                                color[i] = "grey"
+                color = np.where(self.atk.getRegionLabels() < 0, "red", "grey").tolist()
             elif radio_buttons_for_color_choice.v_model == "Clustering auto":
                 color = self.__labels_automatic_clustering
                 to_modify = False
                 scale = False
-            with self.fig1.batch_update():
-                self.fig1.data[0].marker.color = color
-                if color is not None:
-                    self.fig1.data[0].customdata= color
-                else:
-                    self.fig1.data[0].customdata= [None]*len(self.atk.dataset.X)
-                if opacity:
-                    self.fig1.data[0].marker.opacity = 1
-            with self.fig2.batch_update():
-                self.fig2.data[0].marker.color = color
-                if opacity:
-                    self.fig2.data[0].marker.opacity = 1
-                if color is not None:
-                    self.fig2.data[0].customdata= color
-                else:
-                    self.fig2.data[0].customdata= [None]*len(self.atk.dataset.X)
-            with self.fig1_3D.batch_update():
-                self.fig1_3D.data[0].marker.color = color
-                if color is not None:
-                    self.fig1_3D.data[0].customdata= color
-                else:
-                    self.fig1_3D.data[0].customdata= [None]*len(self.atk.dataset.X)
-            with self.fig2_3D.batch_update():
-                self.fig2_3D.data[0].marker.color = color
-                if color is not None:
-                    self.fig2_3D.data[0].customdata= color
+            customdata = color if color is not None else [None]*len(self.atk.dataset.X)
+            for name, figure_state in self.scatters.items():
+                if opacity and name in ["fig1", "fig2"]:
+                    figure_state.setMarkers(color=color, customdata=customdata, opacity=1)
                 else:
-                    self.fig2_3D.data[0].customdata= [None]*len(self.atk.dataset.X)
+                    figure_state.setMarkers(color=color, customdata=customdata)
             if scale:
                 self.fig1.update_traces(marker=dict(showscale=True))
                 self.fig1_3D.update_traces(marker=dict(showscale=True))
@@ -591,16 +609,10 @@ class GUI():
             self.atk.regions = [element for element in self.atk.saves[index]["regions"]]
             color = deepcopy(self.atk.saves[index]["labels"])
             self.__color_regions = deepcopy(color)
-            with self.fig1.batch_update():
-                self.fig1.data[0].marker.color = color
-                self.fig1.data[0].marker.opacity = 1
-            with self.fig2.batch_update():
-                self.fig2.data[0].marker.color = color
-                self.fig2.data[0].marker.opacity = 1
-            with self.fig1_3D.batch_update():
-                self.fig1_3D.data[0].marker.color = color
-            with self.fig2_3D.batch_update():
-                self.fig2_3D.data[0].marker.color = color
+            self.scatters["fig1"].setMarkers(color=color, opacity=1)
+            self.scatters["fig2"].setMarkers(color=color, opacity=1)
+            self.scatters["fig1_3D"].setMarkers(color=color)
+            self.scatters["fig2_3D"].setMarkers(color=color)
             radio_buttons_for_color_choice.v_model = "Régions"
             self.fig1.update_traces(marker=dict(showscale=False))
             self.fig2.update_traces(marker=dict(showscale=False))
@@ -622,8 +634,10 @@ class GUI():
         new_save.on_event("click", function_new_save)
 
         # value space graph
+        # in large-data mode, the figures are drawn with WebGL and only show a part of the points (see antakia.figures)
+        scatter = go.Scattergl if len(self.atk.dataset.X) > self.max_points else go.Scatter
         self.fig1 = go.FigureWidget(
-            data=go.Scatter(x=[1], y=[1], mode="markers", marker=marker1, customdata=marker1["color"], hovertemplate = '%{customdata:.3f}')
+            data=scatter(x=[1], y=[1], mode="markers", marker=marker1, customdata=marker1["color"], hovertemplate = '%{customdata:.3f}')
         )
 
         # to remove the plotly logo
@@ -637,7 +651,7 @@ class GUI():
 
         # grapbique de l'espace des explications
         self.fig2 = go.FigureWidget(
-            data=go.Scatter(x=[1], y=[1], mode="markers", marker=marker2, customdata=marker2["color"], hovertemplate = '%{customdata:.3f}')
+            data=scatter(x=[1], y=[1], mode="markers", marker=marker2, customdata=marker2["color"], hovertemplate = '%{customdata:.3f}')
         )
 
         self.fig2.update_layout(margin=dict(l=M, r=M, t=0, b=M), width=int(fig_size.v_model))
@@ -716,8 +730,28 @@ class GUI():
 
         self.fig2_3D._config = self.fig2_3D._config | {"displaylogo": False}
 
+        self.scatters = {name: FigureState(figure, self.max_points) for name, figure in [("fig1", self.fig1), ("fig2", self.fig2), ("fig1_3D", self.fig1_3D), ("fig2_3D", self.fig2_3D)]}
+        for figure_state in self.scatters.values():
+            figure_state.setMarkers(color=self.atk.dataset.y, customdata=self.atk.dataset.y)
+
         compute.update_figures(self, self.__explanation, self.__projectionVS, self.__projectionES)
 
+        # in large-data mode, the points of the viewport are displayed when zooming
+        def function_zoom(name):
+            def zoom(layout, xrange, yrange):
+                self.scatters[name].zoom(xrange, yrange)
+            return zoom
+
+        self.fig1.layout.on_change(function_zoom("fig1"), "xaxis.range", "yaxis.range")
+        self.fig2.layout.on_change(function_zoom("fig2"), "xaxis.range", "yaxis.range")
+
+        # the other projections are computed in advance, in the background
+        for method in ["PCA", "t-SNE", "UMAP", "PaCMAP"]:
+            if self.dim_red["VS"][method] is None:
+                self.__request_projection("VS", method, prefetch=True)
+            if self.dim_red["ES"][self.__explanation][method] is None:
+                self.__request_projection("ES", method, prefetch=True)
+
         # text that indicate spaces for better understanding
         textVS = widgets.HTML("<h3>Values Space<h3>")
         textES = widgets.HTML("<h3>Explanatory Space<h3>")
@@ -737,15 +771,9 @@ class GUI():
             self.__projectionES = deepcopy(dropdown_for_ES.v_model)
 
             if self.dim_red["VS"][dropdown_for_VS.v_model] is None:
-                out_loading1.layout.visibility = "visible"
-                dim_red_compute = compute.DimensionalityReductionChooser(method=dropdown_for_VS.v_model)
-                self.dim_red["VS"][dropdown_for_VS.v_model] = [dim_red_compute.compute(self.atk.dataset.X_scaled, 2), dim_red_compute.compute(self.atk.dataset.X_scaled, 3)]
-                out_loading1.layout.visibility = "hidden"
+                self.__request_projection("VS", dropdown_for_VS.v_model, loading=out_loading1)
             if self.dim_red["ES"][self.__explanation][dropdown_for_ES.v_model] is None:
-                out_loading2.layout.visibility = "visible"
-                dim_red_compute = compute.DimensionalityReductionChooser(method=dropdown_for_ES.v_model)
-                self.dim_red["ES"][self.__explanation][dropdown_for_ES.v_model] = [dim_red_compute.compute(self.atk.explain[self.__explanation], 2), dim_red_compute.compute(self.atk.explain[self.__explanation], 3)]
-                out_loading2.layout.visibility = "hidden"
+                self.__request_projection("ES", dropdown_for_ES.v_model, loading=out_loading2)
 
             compute.update_figures(self, self.__explanation, self.__projectionVS, self.__projectionES)
 
@@ -1099,66 +1127,31 @@ class GUI():
                 ].index
                 new_tuile = [g for g in new_tuile if g in X_temp]
             """
-            new_tuile = self.selection.applyRules(to_return=True)
-            y_shape_skope = []
-            y_color_skope = []
-            y_opa_skope = []
-            for i in range(len(self.atk.dataset.X)):
-                if i in new_tuile:
-                    y_shape_skope.append("circle")
-                    y_color_skope.append("blue")
-                    y_opa_skope.append(0.5)
-                else:
-                    y_shape_skope.append("cross")
-                    y_color_skope.append("grey")
-                    y_opa_skope.append(0.5)
-            with self.fig1.batch_update():
-                self.fig1.data[0].marker.color = y_color_skope
-            with self.fig2.batch_update():
-                self.fig2.data[0].marker.color = y_color_skope
-            with self.fig1_3D.batch_update():
-                self.fig1_3D.data[0].marker.color = y_color_skope
-            with self.fig2_3D.batch_update():
-                self.fig2_3D.data[0].marker.color = y_color_skope
+            in_tuile = self.selection.applyRules(to_return=True)
+            y_color_skope = np.where(in_tuile, "blue", "grey").tolist()
+            for figure_state in self.scatters.values():
+                figure_state.setMarkers(color=y_color_skope)
 
         # allows to modify all the histograms according to the rules
         def modifie_all_histograms(value_min, value_max, index):
-            new_list_tout = self.atk.dataset.X.index[
-                self.atk.dataset.X[self.selection.rules[index][2]].between(value_min, value_max)
-            ].tolist()
-            for i in range(len(self.selection.rules)):
-                min = self.selection.rules[i][0]
-                max = self.selection.rules[i][4]
-                if i != index:
-                    new_list_temp = self.atk.dataset.X.index[
-                        self.atk.dataset.X[self.selection.rules[i][2]].between(min, max)
-                    ].tolist()
-                    new_list_tout = [g for g in new_list_tout if g in new_list_temp]
+            dataset = self.atk.dataset
+            # the rule being modified takes the values of its slider
+            rules = [
+                [value_min, "<=", rule[2], "<=", value_max] if i == index else rule
+                for i, rule in enumerate(self.selection.rules)
+            ]
+            in_all = np.ones(len(dataset.X), dtype=bool)
+            for rule in rules:
+                in_all &= dataset.sortedColumn(rule[2]).mask(rule)
             if self.selection.indexes_from_map is not None:
-                new_list_tout = [g for g in new_list_tout if g in self.selection.indexes_from_map]
+                in_all &= positions_mask(self.selection.indexes_from_map, len(dataset.X))
             for i in range(len(self.selection.rules)):
                 with all_histograms[i].batch_update():
-                    all_histograms[i].data[2].x = self.atk.dataset.X[self.selection.rules[i][2]][new_list_tout]
+                    all_histograms[i].data[2].x = dataset.X[self.selection.rules[i][2]][in_all]
                 if all_color_choosers_beeswarms[i].children[1].v_model:
                     with all_beeswarms[i].batch_update():
-                        y_color = [0] * len(self.atk.explain[self.__explanation])
-                        if i == index:
-                            indexs = self.atk.dataset.X.index[
-                                self.atk.dataset.X[self.selection.rules[i][2]].between(value_min, value_max)
-                            ].tolist()
-                        else:
-                            indexs = self.atk.dataset.X.index[
-                                self.atk.dataset.X[self.selection.rules[i][2]].between(
-                                    self.selection.rules[i][0], self.selection.rules[i][4]
-                                )
-                            ].tolist()
-                        for j in range(len(self.atk.explain[self.__explanation])):
-                            if j in new_list_tout:
-                                y_color[j] = "blue"
-                            elif j in indexs:
-                                y_color[j] = "#85afcb"
-                            else:
-                                y_color[j] = "grey"
+                        in_rule = dataset.sortedColumn(rules[i][2]).mask(rules[i])
+                        y_color = np.select([in_all, in_rule], ["blue", "#85afcb"], "grey").tolist()
                         all_beeswarms[i].data[0].marker.color = y_color
 
         # when the value of a slider is modified, the histograms and graphs are modified
@@ -1171,12 +1164,9 @@ class GUI():
                     return
                 else:
                     slider_skope1.v_model = [float(slider_text_comb1.children[0].v_model), float(slider_text_comb1.children[2].v_model)]
-            new_list = [
-                g
-                for g in list(self.atk.dataset.X[self.selection.rules[0][2]].values)
-                if g >= slider_skope1.v_model[0]
-                and g <= slider_skope1.v_model[1]
-            ]
+            new_list = self.atk.dataset.sortedColumn(self.selection.rules[0][2]).between(
+                [slider_skope1.v_model[0], "<=", None, "<=", slider_skope1.v_model[1]]
+            )
             with histogram1.batch_update():
                 histogram1.data[1].x = new_list
             if self.__activate_histograms:
@@ -1195,12 +1185,9 @@ class GUI():
             if widget.__class__.__name__ == "RangeSlider":
                 slider_text_comb2.children[0].v_model = slider_skope2.v_model[0]  
                 slider_text_comb2.children[2].v_model = slider_skope2.v_model[1]  
-            new_list = [
-                g
-                for g in list(self.atk.dataset.X[self.selection.rules[1][2]].values)
-                if g >= slider_skope2.v_model[0]  
-                and g <= slider_skope2.v_model[1]  
-            ]
+            new_list = self.atk.dataset.sortedColumn(self.selection.rules[1][2]).between(
+                [slider_skope2.v_model[0], "<=", None, "<=", slider_skope2.v_model[1]]
+            )
             with histogram2.batch_update():
                 histogram2.data[1].x = new_list
             if self.__activate_histograms:
@@ -1217,12 +1204,9 @@ class GUI():
             if widget.__class__.__name__ == "RangeSlider":
                 slider_text_comb3.children[0].v_model = slider_skope3.v_model[0]  
                 slider_text_comb3.children[2].v_model = slider_skope3.v_model[1]  
-            new_list = [
-                g
-                for g in list(self.atk.dataset.X[self.selection.rules[2][2]].values)
-                if g >= slider_skope3.v_model[0]  
-                and g <= slider_skope3.v_model[1]  
-            ]
+            new_list = self.atk.dataset.sortedColumn(self.selection.rules[2][2]).between(
+                [slider_skope3.v_model[0], "<=", None, "<=", slider_skope3.v_model[1]]
+            )
             with histogram3.batch_update():
                 histogram3.data[1].x = new_list
             if self.__activate_histograms:
@@ -1364,10 +1348,11 @@ class GUI():
                 mods.children[i].children[0].children[1].children = string_for_score(i)
 
         # when you click on the skope-rules button
-        def function_validation_skope(*sender):
+        # blocking : the rules are found before returning (for the callers that use them right after)
+        def function_validation_skope(*sender, blocking=False):
             loading_models.class_ = "d-flex"
             self.__activate_histograms = True
-            if self.selection.y_train == None:
+            if self.selection.y_train is None:
                 text_skopeVS.children[1].children = [
                     widgets.HTML("Please select points")
                 ]
@@ -1382,199 +1367,233 @@ class GUI():
                     widgets.HTML("You can't choose everything/nothing !")
                 ]
             else:
-                # skope calculation for X
-                self.selection.applySkope(self.__explanation, 0.2, 0.2)
-                print(self.selection.rules)
-                # if no rule for one of the two, nothing is displayed
-                if self.selection.success == False:
-                    text_skopeVS.children[1].children = [
-                        widgets.HTML("No rule found")
-                    ]
-                    text_skopeES.children[1].children = [
-                        widgets.HTML("No rule found")
-                    ]
-                # otherwise we display
+                # the rules are searched in the background : the interface is not frozen
+                if self.__skope_task is not None:
+                    self.__skope_task.cancel()
+                task = compute.SkopeTask(self.selection, self.__explanation, 0.2, 0.2)
+                self.__skope_task = task
+                loading_models.indeterminate = False
+                loading_models.v_model = 0
+
+                def status(text):
+                    if task is self.__skope_task:
+                        text_skopeVS.children[1].children = [widgets.HTML(text)]
+                        text_skopeES.children[1].children = [widgets.HTML(text)]
+
+                task.watch(loading_models, status)
+                if blocking:
+                    try:
+                        result = task.compute()
+                    except Exception as e:
+                        print("AntakIA ERROR : the rules could not be found (" + str(e) + ")")
+                        function_skope_abort(task)
+                        return
+                    function_skope_found(task, result)
                 else:
-                    #chaine_carac = transform_string(skope_rules_clf.rules_[0])
-                    text_skopeVS.children[0].children[3].children = [
-                        "p = "
-                        + str(self.selection.score[0])
-                        + "%"
-                        + " r = "
-                        + str(self.selection.score[1])
-                        + "%"
-                        + " ext. of the tree = "
-                        + str(self.selection.score[2])
-                    ]
+                    task.compute_in_thread(lambda result: function_skope_found(task, result), lambda e: function_skope_abort(task))
+                return
+            function_end_skope()
+
+        # when the search of the rules has failed, or its result is dropped
+        def function_skope_abort(task):
+            task.unwatch()
+            if task is self.__skope_task:
+                self.__skope_task = None
+                loading_models.indeterminate = True
+                loading_models.class_ = "d-none"
+
+        # when the rules of the selection are found
+        def function_skope_found(task, result):
+            if task.isStale(self.selection):
+                # the selection has changed since : the rules are not the ones of the current selection
+                function_skope_abort(task)
+                return
+            task.unwatch()
+            self.__skope_task = None
+            loading_models.indeterminate = True
+            self.selection.setSkopeResult(result)
+            print(self.selection.rules)
+            # if no rule for one of the two, nothing is displayed
+            if self.selection.success == False:
+                text_skopeVS.children[1].children = [
+                    widgets.HTML("No rule found")
+                ]
+                text_skopeES.children[1].children = [
+                    widgets.HTML("No rule found")
+                ]
+            # otherwise we display
+            else:
+                #chaine_carac = transform_string(skope_rules_clf.rules_[0])
+                text_skopeVS.children[0].children[3].children = [
+                    "p = "
+                    + str(self.selection.score[0])
+                    + "%"
+                    + " r = "
+                    + str(self.selection.score[1])
+                    + "%"
+                    + " ext. of the tree = "
+                    + str(self.selection.score[2])
+                ]
 
-                    # there we find the values ​​of the skope to use them for the sliders
-                    columns_rules = [self.selection.rules[i][2] for i in range(len(self.selection.rules))]
-                    new_columns_rules = []
-                    for i in range(len(columns_rules)):
-                        if columns_rules[i] not in new_columns_rules:
-                            new_columns_rules.append(columns_rules[i])
-                    columns_rules = new_columns_rules
+                # there we find the values ​​of the skope to use them for the sliders
+                columns_rules = [self.selection.rules[i][2] for i in range(len(self.selection.rules))]
+                new_columns_rules = []
+                for i in range(len(columns_rules)):
+                    if columns_rules[i] not in new_columns_rules:
+                        new_columns_rules.append(columns_rules[i])
+                columns_rules = new_columns_rules
 
-                    self.__other_columns = [g for g in self.atk.dataset.X.columns if g not in columns_rules]
+                self.__other_columns = [g for g in self.atk.dataset.X.columns if g not in columns_rules]
 
-                    widget_list_add_skope.items = self.__other_columns
-                    widget_list_add_skope.v_model = self.__other_columns[0]
+                widget_list_add_skope.items = self.__other_columns
+                widget_list_add_skope.v_model = self.__other_columns[0]
 
-                    self.selection.rules = self.selection.rules
+                self.selection.rules = self.selection.rules
 
-                    one_card_VS.children = gui_elements.generate_rule_card(
-                        liste_to_string_skope(self.selection.rules)
-                    )
+                one_card_VS.children = gui_elements.generate_rule_card(
+                    liste_to_string_skope(self.selection.rules)
+                )
+
+                [new_y, marker] = compute.function_beeswarm_shap(self, self.__explanation, self.selection.rules[0][2])
+                beeswarm1.data[0].y = deepcopy(new_y)
+                beeswarm1.data[0].x = self.atk.explain[self.__explanation][compute.explanation_column(self.atk.dataset.X, self.atk.explain[self.__explanation], columns_rules[0])]
+                beeswarm1.data[0].marker = marker
+
+                all_histograms = [histogram1]
+                if len(set([self.selection.rules[i][2] for i in range(len(self.selection.rules))])) > 1:
+                    all_histograms = [histogram1, histogram2]
+                    [new_y, marker] = compute.function_beeswarm_shap(self, self.__explanation, self.selection.rules[1][2])
+                    beeswarm2.data[0].y = deepcopy(new_y)
+                    beeswarm2.data[0].x = self.atk.explain[self.__explanation][compute.explanation_column(self.atk.dataset.X, self.atk.explain[self.__explanation], columns_rules[1])]
+                    beeswarm2.data[0].marker = marker
 
-                    [new_y, marker] = compute.function_beeswarm_shap(self, self.__explanation, self.selection.rules[0][2])
-                    beeswarm1.data[0].y = deepcopy(new_y)
-                    beeswarm1.data[0].x = self.atk.explain[self.__explanation][columns_rules[0] + "_shap"]
-                    beeswarm1.data[0].marker = marker
-
-                    all_histograms = [histogram1]
-                    if len(set([self.selection.rules[i][2] for i in range(len(self.selection.rules))])) > 1:
-                        all_histograms = [histogram1, histogram2]
-                        [new_y, marker] = compute.function_beeswarm_shap(self, self.__explanation, self.selection.rules[1][2])
-                        beeswarm2.data[0].y = deepcopy(new_y)
-                        beeswarm2.data[0].x = self.atk.explain[self.__explanation][columns_rules[1] + "_shap"]
-                        beeswarm2.data[0].marker = marker
-
-                    if len(set([self.selection.rules[i][2] for i in range(len(self.selection.rules))])) > 2:
-                        all_histograms = [histogram1, histogram2, histogram3]
-                        [new_y, marker] = compute.function_beeswarm_shap(self, self.__explanation, self.selection.rules[2][2])
-                        beeswarm3.data[0].y = deepcopy(new_y)
-                        beeswarm3.data[0].x = self.atk.explain[self.__explanation][columns_rules[2] + "_shap"]
-                        beeswarm3.data[0].marker = marker
-
-                    y_shape_skope = []
-                    y_color_skope = []
-                    y_opa_skope = []
-                    for i in range(len(self.atk.dataset.X)):
-                        if i in self.selection.indexes:
-                            y_shape_skope.append("circle")
-                            y_color_skope.append("blue")
-                            y_opa_skope.append(0.5)
-                        else:
-                            y_shape_skope.append("cross")
-                            y_color_skope.append("grey")
-                            y_opa_skope.append(0.5)
-                    radio_buttons_for_color_choice.v_model = "Selec actuelle"
-                    function_change_color(None)
+                if len(set([self.selection.rules[i][2] for i in range(len(self.selection.rules))])) > 2:
+                    all_histograms = [histogram1, histogram2, histogram3]
+                    [new_y, marker] = compute.function_beeswarm_shap(self, self.__explanation, self.selection.rules[2][2])
+                    beeswarm3.data[0].y = deepcopy(new_y)
+                    beeswarm3.data[0].x = self.atk.explain[self.__explanation][compute.explanation_column(self.atk.dataset.X, self.atk.explain[self.__explanation], columns_rules[2])]
+                    beeswarm3.data[0].marker = marker
+
+                radio_buttons_for_color_choice.v_model = "Selec actuelle"
+                function_change_color(None)
+
+                accordion_skope.children = [
+                    in_accordion1_n,
+                ]
 
+                in_accordion1_n.children[0].children[0].children = (
+                    "X1 (" + columns_rules[0].replace("_", " ") + ")"
+                )
+
+                if len(columns_rules) > 1:
                     accordion_skope.children = [
                         in_accordion1_n,
+                        in_accordion2_n,
                     ]
-
-                    in_accordion1_n.children[0].children[0].children = (
-                        "X1 (" + columns_rules[0].replace("_", " ") + ")"
+                    in_accordion2_n.children[0].children[0].children = (
+                        "X2 (" + columns_rules[1].replace("_", " ") + ")"
+                    )
+                if len(columns_rules) > 2:
+                    accordion_skope.children = [
+                        in_accordion1_n,
+                        in_accordion2_n,
+                        in_accordion3_n,
+                    ]
+                    in_accordion3_n.children[0].children[0].children = (
+                        "X3 (" + columns_rules[2].replace("_", " ") + ")"
                     )
 
-                    if len(columns_rules) > 1:
-                        accordion_skope.children = [
-                            in_accordion1_n,
-                            in_accordion2_n,
-                        ]
-                        in_accordion2_n.children[0].children[0].children = (
-                            "X2 (" + columns_rules[1].replace("_", " ") + ")"
-                        )
-                    if len(columns_rules) > 2:
-                        accordion_skope.children = [
-                            in_accordion1_n,
-                            in_accordion2_n,
-                            in_accordion3_n,
-                        ]
-                        in_accordion3_n.children[0].children[0].children = (
-                            "X3 (" + columns_rules[2].replace("_", " ") + ")"
-                        )
+                self.__all_widgets_class_1 = gui_elements.create_class_selector(self, columns_rules[0], self.selection.rules[0][0], self.selection.rules[0][4], fig_size=fig_size.v_model)
+                if len(columns_rules) > 1:
+                    self.__all_widgets_class_2 = gui_elements.create_class_selector(self, columns_rules[1], self.selection.rules[1][0], self.selection.rules[1][4], fig_size=fig_size.v_model)
+                if len(columns_rules) > 2:
+                    self.__all_widgets_class_3 = gui_elements.create_class_selector(self, columns_rules[2], self.selection.rules[2][0], self.selection.rules[2][4], fig_size=fig_size.v_model)
 
-                    self.__all_widgets_class_1 = gui_elements.create_class_selector(self, columns_rules[0], self.selection.rules[0][0], self.selection.rules[0][4], fig_size=fig_size.v_model)
-                    if len(columns_rules) > 1:
-                        self.__all_widgets_class_2 = gui_elements.create_class_selector(self, columns_rules[1], self.selection.rules[1][0], self.selection.rules[1][4], fig_size=fig_size.v_model)
-                    if len(columns_rules) > 2:
-                        self.__all_widgets_class_3 = gui_elements.create_class_selector(self, columns_rules[2], self.selection.rules[2][0], self.selection.rules[2][4], fig_size=fig_size.v_model)
+                for ii in range(len(self.__all_widgets_class_1.children[2].children)):
+                    self.__all_widgets_class_1.children[2].children[ii].on_event("change", change_continuous1)
 
-                    for ii in range(len(self.__all_widgets_class_1.children[2].children)):
-                        self.__all_widgets_class_1.children[2].children[ii].on_event("change", change_continuous1)
+                for ii in range(len(self.__all_widgets_class_2.children[2].children)):
+                    self.__all_widgets_class_2.children[2].children[ii].on_event("change", change_continuous2)
 
-                    for ii in range(len(self.__all_widgets_class_2.children[2].children)):
-                        self.__all_widgets_class_2.children[2].children[ii].on_event("change", change_continuous2)
+                for ii in range(len(self.__all_widgets_class_3.children[2].children)):
+                    self.__all_widgets_class_3.children[2].children[ii].on_event("change", change_continuous3)
 
-                    for ii in range(len(self.__all_widgets_class_3.children[2].children)):
-                        self.__all_widgets_class_3.children[2].children[ii].on_event("change", change_continuous3)
+                if self.atk.dataset.lat in columns_rules and self.atk.dataset.long in columns_rules:
+                    button_add_map.disabled = False
+                else:
+                    button_add_map.disabled = True
 
-                    if self.atk.dataset.lat in columns_rules and self.atk.dataset.long in columns_rules:
-                        button_add_map.disabled = False
-                    else:
-                        button_add_map.disabled = True
+                slider_skope1.min = -10e10
+                slider_skope1.max = 10e10
+                slider_skope2.min = -10e10
+                slider_skope2.max = 10e10
+                slider_skope3.min = -10e10
+                slider_skope3.max = 10e10
+
+                slider_skope1.max = max(self.atk.dataset.X[columns_rules[0]])
+                slider_skope1.min = min(self.atk.dataset.X[columns_rules[0]])
+                slider_skope1.v_model = [self.selection.rules[0][0], self.selection.rules[0][-1]]
+                [slider_text_comb1.children[0].v_model, slider_text_comb1.children[2].v_model] = [slider_skope1.v_model[0], slider_skope1.v_model[1]]
+
+                if len(self.selection.rules) > 1 :
+                    slider_skope2.max = max(self.atk.dataset.X[columns_rules[1]])
+                    slider_skope2.min = min(self.atk.dataset.X[columns_rules[1]])
+                    slider_skope2.v_model = [self.selection.rules[1][0], self.selection.rules[1][-1]]
+                    [slider_text_comb2.children[0].v_model, slider_text_comb2.children[2].v_model] = [slider_skope2.v_model[0],slider_skope2.v_model[1]]
+
+                if len(self.selection.rules) > 2:
+                    slider_skope3.max = max(self.atk.dataset.X[columns_rules[2]])
+                    slider_skope3.min = min(self.atk.dataset.X[columns_rules[2]])
+                    slider_skope3.v_model = [self.selection.rules[2][0], self.selection.rules[2][-1]]
+                    [
+                        slider_text_comb3.children[0].v_model,
+                        slider_text_comb3.children[2].v_model,
+                    ] = [
+                        slider_skope3.v_model[0],
+                        slider_skope3.v_model[1],
+                    ]
 
-                    slider_skope1.min = -10e10
-                    slider_skope1.max = 10e10
-                    slider_skope2.min = -10e10
-                    slider_skope2.max = 10e10
-                    slider_skope3.min = -10e10
-                    slider_skope3.max = 10e10
-
-                    slider_skope1.max = max(self.atk.dataset.X[columns_rules[0]])
-                    slider_skope1.min = min(self.atk.dataset.X[columns_rules[0]])
-                    slider_skope1.v_model = [self.selection.rules[0][0], self.selection.rules[0][-1]]
-                    [slider_text_comb1.children[0].v_model, slider_text_comb1.children[2].v_model] = [slider_skope1.v_model[0], slider_skope1.v_model[1]]
-
-                    if len(self.selection.rules) > 1 :
-                        slider_skope2.max = max(self.atk.dataset.X[columns_rules[1]])
-                        slider_skope2.min = min(self.atk.dataset.X[columns_rules[1]])
-                        slider_skope2.v_model = [self.selection.rules[1][0], self.selection.rules[1][-1]]
-                        [slider_text_comb2.children[0].v_model, slider_text_comb2.children[2].v_model] = [slider_skope2.v_model[0],slider_skope2.v_model[1]]
-
-                    if len(self.selection.rules) > 2:
-                        slider_skope3.max = max(self.atk.dataset.X[columns_rules[2]])
-                        slider_skope3.min = min(self.atk.dataset.X[columns_rules[2]])
-                        slider_skope3.v_model = [self.selection.rules[2][0], self.selection.rules[2][-1]]
-                        [
-                            slider_text_comb3.children[0].v_model,
-                            slider_text_comb3.children[2].v_model,
-                        ] = [
-                            slider_skope3.v_model[0],
-                            slider_skope3.v_model[1],
-                        ]
+                with histogram1.batch_update():
+                    histogram1.data[0].x = list(self.atk.dataset.X[columns_rules[0]])
+                    df_respect1 = self.selection.respectOneRule(0)
+                    histogram1.data[1].x = list(df_respect1[columns_rules[0]])
+                if len(set([self.selection.rules[i][2] for i in range(len(self.selection.rules))])) > 1:
+                    with histogram2.batch_update():
+                        histogram2.data[0].x = list(self.atk.dataset.X[columns_rules[1]])
+                        df_respect2 = self.selection.respectOneRule(1)
+                        histogram2.data[1].x = list(df_respect2[columns_rules[1]])
+                if len(set([self.selection.rules[i][2] for i in range(len(self.selection.rules))])) > 2:
+                    with histogram3.batch_update():
+                        histogram3.data[0].x = list(self.atk.dataset.X[columns_rules[2]])
+                        df_respect3 = self.selection.respectOneRule(2)
+                        histogram3.data[1].x = list(df_respect3[columns_rules[2]])
 
-                    with histogram1.batch_update():
-                        histogram1.data[0].x = list(self.atk.dataset.X[columns_rules[0]])
-                        df_respect1 = self.selection.respectOneRule(0)
-                        histogram1.data[1].x = list(df_respect1[columns_rules[0]])
-                    if len(set([self.selection.rules[i][2] for i in range(len(self.selection.rules))])) > 1:
-                        with histogram2.batch_update():
-                            histogram2.data[0].x = list(self.atk.dataset.X[columns_rules[1]])
-                            df_respect2 = self.selection.respectOneRule(1)
-                            histogram2.data[1].x = list(df_respect2[columns_rules[1]])
-                    if len(set([self.selection.rules[i][2] for i in range(len(self.selection.rules))])) > 2:
-                        with histogram3.batch_update():
-                            histogram3.data[0].x = list(self.atk.dataset.X[columns_rules[2]])
-                            df_respect3 = self.selection.respectOneRule(2)
-                            histogram3.data[1].x = list(df_respect3[columns_rules[2]])
+                modifie_all_histograms(
+                    slider_skope1.v_model[0], slider_skope1.v_model[1], 0
+                )
 
-                    modifie_all_histograms(
-                        slider_skope1.v_model[0], slider_skope1.v_model[1], 0
-                    )
+                text_skopeES.children[0].children[3].children = [
+                    # str(skope_rules_clf.rules_[0])
+                    # + "\n"
+                    "p = "
+                    + str(self.selection.score_exp[0])
+                    + "%"
+                    + " r = "
+                    + str(self.selection.score_exp[1])
+                    + "%"
+                    + " ext. of the tree ="
+                    + str(self.selection.score_exp[2])
+                ]
+                one_card_ES.children = gui_elements.generate_rule_card(liste_to_string_skope(self.selection.rules_exp))
+                function_scores_models(self.selection.indexes)
 
-                    text_skopeES.children[0].children[3].children = [
-                        # str(skope_rules_clf.rules_[0])
-                        # + "\n"
-                        "p = "
-                        + str(self.selection.score_exp[0])
-                        + "%"
-                        + " r = "
-                        + str(self.selection.score_exp[1])
-                        + "%"
-                        + " ext. of the tree ="
-                        + str(self.selection.score_exp[2])
-                    ]
-                    one_card_ES.children = gui_elements.generate_rule_card(liste_to_string_skope(self.selection.rules_exp))
-                    function_scores_models(self.selection.indexes)
+                in_accordion1_n.children[0].disabled = False
+                in_accordion2_n.children[0].disabled = False
+                in_accordion3_n.children[0].disabled = False
 
-                    in_accordion1_n.children[0].disabled = False
-                    in_accordion2_n.children[0].disabled = False
-                    in_accordion3_n.children[0].disabled = False
+            function_end_skope()
 
+        def function_end_skope():
             slider_skope1.on_event("input", on_value_change_skope1)
             slider_skope2.on_event("input", on_value_change_skope2)
             slider_skope3.on_event("input", on_value_change_skope3)
@@ -1590,7 +1609,7 @@ class GUI():
 
         def reset_skope(*b):
             self.selection.rules = self.__save_rules
-            function_validation_skope(None)
+            function_validation_skope(None, blocking=True)
             function_scores_models(None)
 
         button_reset_skope.on_event("click", reset_skope)
@@ -1705,16 +1724,10 @@ class GUI():
             self.__result_dyadic_clustering = result
             labels = result[1]
             self.__labels_automatic_clustering = labels
-            with self.fig1.batch_update():
-                self.fig1.data[0].marker.color = labels
-                self.fig1.update_traces(marker=dict(showscale=False))
-            with self.fig2.batch_update():
-                self.fig2.data[0].marker.color = labels
-            with self.fig1_3D.batch_update():
-                self.fig1_3D.data[0].marker.color = labels
-                self.fig1_3D.update_traces(marker=dict(showscale=False))
-            with self.fig2_3D.batch_update():
-                self.fig2_3D.data[0].marker.color = labels
+            for figure_state in self.scatters.values():
+                figure_state.setMarkers(color=labels)
+            self.fig1.update_traces(marker=dict(showscale=False))
+            self.fig1_3D.update_traces(marker=dict(showscale=False))
             labels_regions = result[0]
             new_df = []
             for i in range(len(labels_regions)):
@@ -1817,7 +1830,9 @@ class GUI():
                 liste = args[0]
                 les_points = liste
             else:
-                les_points = points.point_inds
+                # in large-data mode, the lasso also selects the points that are not displayed
+                figure_state = self.scatters["fig1"] if trace is self.fig1.data[0] else self.scatters["fig2"]
+                les_points = figure_state.selected(points, selector).tolist()
             self.selection = Potato(self.atk, les_points)
             self.selection.state = Potato.LASSO
             if len(les_points) == 0:
@@ -1837,16 +1852,10 @@ class GUI():
                 + str(round(len(les_points) / len(self.atk.dataset.X) * 100, 2))
                 + "% of the overall)"
             )
-            opa = []
-            for i in range(len(self.fig2.data[0].x)):
-                if i in les_points:
-                    opa.append(1)
-                else:
-                    opa.append(0.1)
-            with self.fig2.batch_update():
-                self.fig2.data[0].marker.opacity = opa
-            with self.fig1.batch_update():
-                self.fig1.data[0].marker.opacity = opa
+            opa = np.full(len(self.atk.dataset.X), 0.1)
+            opa[les_points] = 1
+            self.scatters["fig2"].setMarkers(opacity=opa)
+            self.scatters["fig1"].setMarkers(opacity=opa)
 
             X_train = self.atk.dataset.X.copy()
 
@@ -1975,18 +1984,13 @@ class GUI():
                     return
 
                 self.selection.applyRules()
-                new_tuile = deepcopy(self.selection.getIndexes())
+                new_tuile = self.selection.mask.copy()
                 self.selection.sub_model["name"], self.selection.sub_model["score"] = name_model, score_model
                 # here we will force so that all the points of the new tile belong only to it: we will modify the existing tiles
-                self.atk.regions = conflict_handler(self.atk.regions, new_tuile)
+                conflict_handler(self.atk.regions, new_tuile, self.atk.getRegionLabels())
                 self.selection.setIndexes(new_tuile)
                 self.atk.newRegion(self.selection)
-            self.__color_regions=[0]*len(self.atk.dataset.X)
-            for i in range(len(self.__color_regions)):
-                for j in range(len(self.atk.regions)):
-                    if i in self.atk.regions[j].indexes:
-                        self.__color_regions[i] = j+1
-                        break
+            self.__color_regions = (self.atk.getRegionLabels() + 1).tolist()
 
             toute_somme = 0
             temp = []
@@ -2100,7 +2104,7 @@ class GUI():
                     a = 0
                     for i in range(taille):
                         index = table_donnes.v_model[i]["Region #"] - 1
-                        self.atk.regions.pop(index - a)
+                        self.atk.deleteRegion(index - a)
                         function_new_region()
                         a += 1
                     radio_buttons_for_color_choice.v_model = "Régions"
@@ -2263,7 +2267,7 @@ class GUI():
                 [new_slider_text_comb, new_histogram, new_two_end]
             )
 
-            column_shap = column + "_shap"
+            column_shap = compute.explanation_column(self.atk.dataset.X, self.atk.explain[self.__explanation], column)
             y_histo_shap = [0] * len(self.atk.explain[self.__explanation])
             new_beeswarm = go.FigureWidget(
                 data=[go.Scatter(x=self.atk.explain[self.__explanation][column_shap], y=y_histo_shap, mode="markers")]
@@ -2437,30 +2441,16 @@ class GUI():
             accordion_skope.children[-1].children[0].children[0].children = name_colcol
 
             with new_histogram.batch_update():
-                new_list = [
-                    g
-                    for g in list(self.atk.dataset.X[column].values)
-                    if g >= new_slider_skope.v_model[0]  
-                    and g <= new_slider_skope.v_model[1]  
-                ]
+                new_rule = [new_slider_skope.v_model[0], "<=", column, "<=", new_slider_skope.v_model[1]]
+                new_list = self.atk.dataset.sortedColumn(column).between(new_rule)
                 new_histogram.data[1].x = new_list
 
                 column_2 = new_slider_skope.label
-                new_list_rule = self.atk.dataset.X.index[
-                    self.atk.dataset.X[column_2].between(
-                        new_slider_skope.v_model[0]  ,
-                        new_slider_skope.v_model[1]  ,
-                    )
-                ].tolist()
-                new_list_tout = new_list_rule.copy()
+                new_rule[2] = column_2
+                in_all = self.atk.dataset.sortedColumn(column_2).mask(new_rule)
                 for i in range(1, len(self.selection.rules)):
-                    new_list_temp = self.atk.dataset.X.index[
-                        self.atk.dataset.X[self.selection.rules[i][2]].between(
-                            self.selection.rules[i][0], self.selection.rules[i][4]
-                        )
-                    ].tolist()
-                    new_list_tout = [g for g in new_list_tout if g in new_list_temp]
-                new_list_tout_new = self.atk.dataset.X[column_2][new_list_tout]
+                    in_all &= self.atk.dataset.sortedColumn(self.selection.rules[i][2]).mask(self.selection.rules[i])
+                new_list_tout_new = self.atk.dataset.X[column_2][in_all]
                 new_histogram.data[2].x = new_list_tout_new
 
             def new_on_value_change_skope(*b1):
@@ -2476,12 +2466,9 @@ class GUI():
                     if self.selection.rules[i][2] == column_2:
                         ii = i
                         break
-                new_list = [
-                    g
-                    for g in list(self.atk.dataset.X[column_2].values)
-                    if g >= new_slider_skope.v_model[0]  
-                    and g <= new_slider_skope.v_model[1]  
-                ]
+                new_list = self.atk.dataset.sortedColumn(column_2).between(
+                    [new_slider_skope.v_model[0], "<=", column_2, "<=", new_slider_skope.v_model[1]]
+                )
                 with new_histogram.batch_update():
                     new_histogram.data[1].x = new_list
                 if self.__activate_histograms:
@@ -2547,10 +2534,8 @@ class GUI():
         ]
 
         def function_reset_opa(*args):
-            with self.fig1.batch_update():
-                self.fig1.data[0].marker.opacity = 1
-            with self.fig2.batch_update():
-                self.fig2.data[0].marker.opacity = 1
+            self.scatters["fig1"].setMarkers(opacity=1)
+            self.scatters["fig2"].setMarkers(opacity=1)
 
         bouton_reset_opa.on_event("click", function_reset_opa)
 
@@ -2574,11 +2559,9 @@ class GUI():
 
         def function_choose_explanation(widget, event, data):
             self.__explanation = data
-            exp_val = self.atk.explain[data]
-            if self.dim_red['ES'][self.__explanation][self.__projectionES] == None:
-                out_loading2.layout.visibility = "visible"
-                dim_red = compute.DimensionalityReductionChooser(method=dropdown_for_ES.v_model)
-                self.dim_red['ES'][self.__explanation][self.__projectionES] = [dim_red.compute(exp_val, 2), dim_red.compute(exp_val, 3)]
+            if self.dim_red['ES'][self.__explanation][self.__projectionES] is None:
+                self.__request_projection("ES", self.__projectionES, loading=out_loading2)
+            else:
                 out_loading2.layout.visibility = "hidden"
             compute.update_figures(self, self.__explanation, self.__projectionVS, self.__projectionES)
 
@@ -2599,14 +2582,14 @@ class GUI():
 
         def function_validation_explanation(widget, event, data):
             if widget.v_model == "SHAP":
-                self.__compute_SHAP = compute.computationSHAP(self.atk.dataset.X, self.atk.dataset.X_all, self.atk.dataset.model)
+                self.__compute_SHAP = compute.computationSHAP(self.atk.dataset.X, self.atk.dataset.X_all, self.atk.dataset.model, cache=self.atk.cache, model_version=self.atk.model_version)
                 widgets.jslink((new_prog_SHAP.children[1], "v_model"), (self.__compute_SHAP.progress_widget, "v_model"))
                 widgets.jslink((new_prog_SHAP.children[2], "v_model"), (self.__compute_SHAP.text_widget, "v_model"))
                 widgets.jslink((new_prog_SHAP.children[-1], "color"), (self.__compute_SHAP.done_widget, "v_model"))
                 self.__compute_SHAP.compute_in_thread()
                 new_prog_SHAP.children[-1].disabled = True
             if widget.v_model == "LIME":
-                self.__compute_LIME = compute.computationLIME(self.atk.dataset.X, self.atk.dataset.X_all, self.atk.dataset.model)
+                self.__compute_LIME = compute.computationLIME(self.atk.dataset.X, self.atk.dataset.X_all, self.atk.dataset.model, cache=self.atk.cache, model_version=self.atk.model_version)
                 widgets.jslink((new_prog_LIME.children[1], "v_model"), (self.__compute_LIME.progress_widget, "v_model"))
                 widgets.jslink((new_prog_LIME.children[2], "v_model"), (self.__compute_LIME.text_widget, "v_model"))
                 widgets.jslink((new_prog_LIME.children[-1], "color"), (self.__compute_LIME.done_widget, "v_model"))
@@ -2614,7 +2597,7 @@ class GUI():
                 new_prog_LIME.children[-1].disabled = True
                 
         def when_SHAP_computation_is_done(*args):
-            self.atk.explain["SHAP"] = self.__compute_SHAP.value
+            self.atk.setExplanation("SHAP", self.__compute_SHAP.value)
             items = choose_explanation.items.copy()
             for item in items:
                 if item['text'] == "SHAP":
@@ -2623,7 +2606,7 @@ class GUI():
             choose_explanation.items = choose_explanation.items[:-1]
 
         def when_LIME_computation_is_done(*args):
-            self.atk.explain["LIME"] = self.__compute_LIME.value
+            self.atk.setExplanation("LIME", self.__compute_LIME.value)
             items = choose_explanation.items.copy()
             for item in items:
                 if item['text'] == "LIME":
@@ -2791,7 +2774,7 @@ class GUI():
                 if demo:
                     stages.children[0].v_model = 1
                 time.sleep(tempo)
-                function_validation_skope(None)
+                function_validation_skope(None, blocking=True)
                 time.sleep(tempo)
                 if demo:
                     stages.children[0].v_model = 2
@@ -2965,26 +2948,28 @@ class GUI():
         L_f = []
         if len(self.atk.regions) == 0:
             return "No region has been created !"
+        frames = {"X": self.atk.dataset.X, "y": self.atk.dataset.y}
+        for method in ["Imported", "SHAP", "LIME"]:
+            frames[method] = self.atk.explain[method]
+        region_set = self.atk.getRegionSet()
+        # the rows keep their index in the dataset
+        if region_set.conflicts():
+            # the regions share points : each region is taken separately
+            parts = {
+                name: [None if frame is None else frame.iloc[region.mask] for region in self.atk.regions]
+                for name, frame in frames.items()
+            }
+        else:
+            parts = {
+                name: [None] * len(self.atk.regions) if frame is None else region_set.split(frame)
+                for name, frame in frames.items()
+            }
         for i in range(len(self.atk.regions)):
             dictio = dict()
-            dictio["X"] = self.atk.dataset.X.iloc[self.atk.regions[i].indexes, :].reset_index(
-                drop=True
-            )
-            dictio["y"] = self.atk.dataset.y.iloc[self.atk.regions[i].indexes].reset_index(drop=True)
+            dictio["X"] = parts["X"][i]
+            dictio["y"] = parts["y"][i]
             dictio["indexs"] = self.atk.regions[i].indexes
-            dictio["explain"] = {"Imported": None, "SHAP": None, "LIME": None}
-            if self.atk.explain["Imported"] is not None:
-                dictio["explain"]["Imported"] = self.atk.explain["Imported"].iloc[self.atk.regions[i].indexes, :].reset_index(
-                    drop=True
-                )
-            if self.atk.explain["LIME"] is not None:
-                dictio["explain"]["LIME"] = self.atk.explain["LIME"].iloc[self.atk.regions[i].indexes, :].reset_index(
-                    drop=True
-                )
-            if self.atk.explain["SHAP"] is not None:
-                dictio["explain"]["SHAP"] = self.atk.explain["SHAP"].iloc[self.atk.regions[i].indexes, :].reset_index(
-                    drop=True
-                )
+            dictio["explain"] = {method: parts[method][i] for method in ["Imported", "SHAP", "LIME"]}
             if self.atk.regions[i].sub_model == None:
                 dictio["model name"] = None
                 dictio["model score"] = None
@@ -707,7 +707,7 @@ def create_beeswarms(gui, exp, fig_size):
     )
 
     y_histo_shap = [0] * len(gui.atk.explain[exp])
-    nom_col_shap = str(gui.atk.dataset.X.columns[0]) + "_shap"
+    nom_col_shap = gui.atk.explain[exp].columns[0]
     essaim1 = go.FigureWidget(
         data=[go.Scatter(x=gui.atk.explain[exp][nom_col_shap], y=y_histo_shap, mode="markers")]
     )
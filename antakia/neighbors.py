@@ -0,0 +1,145 @@
+"""
+Neighbors module for the antakia package : the nearest neighbors of each observation are searched once per space, and shared by the projections and the clustering.
+"""
+
+import numpy as np
+import scipy.sparse
+import umap
+
+from antakia.cache import fingerprint_data, make_key
+
+
+class NeighborIndex():
+    """
+    The (approximate) nearest neighbors of each observation of a space.
+    The search is done with NN-descent (the one used by UMAP), and is exact for small datasets.
+
+    Attributes
+    ----------
+    indices : numpy array
+        The indices of the neighbors of each observation, shape (n, n_neighbors). The first neighbor of an observation is itself.
+    distances : numpy array
+        The euclidean distances to the neighbors, same shape as `indices`.
+    fingerprint : str
+        The fingerprint of the data the index was built on.
+    search_index : NNDescent object
+        The search structure, used to find the neighbors of new observations. None if the index was loaded from the cache.
+    """
+    N_NEIGHBORS = 92 # t-SNE needs 3 * perplexity + 1 neighbors, the observation itself excluded
+
+    def __init__(self, indices, distances, fingerprint=None, search_index=None):
+        """
+        Constructor of the class NeighborIndex. Use `NeighborIndex.build` to search the neighbors of a dataset.
+        """
+        self.indices = np.asarray(indices)
+        self.distances = np.asarray(distances)
+        self.fingerprint = fingerprint
+        self.search_index = search_index
+
+    @property
+    def n_neighbors(self):
+        return self.indices.shape[1]
+
+    def __len__(self):
+        return self.indices.shape[0]
+
+    @classmethod
+    def build(cls, X, n_neighbors=None, cache=None):
+        """
+        Function that searches the nearest neighbors of each observation of X.
+
+        Parameters
+        ----------
+        X : pandas dataframe
+            The data.
+        n_neighbors : int
+            The number of neighbors of each observation (itself included). By default, enough for all the projections.
+        cache : DiskCache object
+            If not None, the neighbors are loaded from (or stored in) this cache.
+
+        Returns
+        -------
+        NeighborIndex object
+            The index of the neighbors of X.
+        """
+        if n_neighbors is None:
+            n_neighbors = cls.N_NEIGHBORS
+        n_neighbors = min(n_neighbors, len(X))
+        fingerprint = fingerprint_data(X)
+        if cache is not None:
+            tags = {"kind": "neighbors", "data": fingerprint}
+            key = make_key(tags, n_neighbors)
+            values = cache.get(key)
+            if values is not None:
+                return cls(values[:, :n_neighbors].astype(np.int64), values[:, n_neighbors:], fingerprint)
+        indices, distances, search_index = umap.umap_.nearest_neighbors(
+            np.asarray(X, dtype=np.float32), n_neighbors, "euclidean", {}, False, None
+        )
+        index = cls(indices, distances, fingerprint, search_index)
+        if cache is not None:
+            cache.set(key, np.hstack([indices, distances]), **tags)
+        return index
+
+    def matches(self, X) -> bool:
+        """
+        Function that tells if the index has been built on X.
+        """
+        return len(self) == len(X) and self.fingerprint == fingerprint_data(X)
+
+    def knn(self, k):
+        """
+        Function that returns the k nearest neighbors of each observation (itself included).
+
+        Returns
+        -------
+        tuple
+            The indices and the distances, of shape (n, k).
+        """
+        if k > self.n_neighbors:
+            raise ValueError("The index only contains " + str(self.n_neighbors) + " neighbors per observation")
+        return self.indices[:, :k], self.distances[:, :k]
+
+    def pairs(self, k):
+        """
+        Function that returns the pairs (observation, neighbor) of the k nearest neighbors, the observation itself excluded.
+        This is the format of the `pair_neighbors` of PaCMAP.
+        """
+        indices, _ = self.knn(k + 1)
+        return np.column_stack([np.repeat(np.arange(len(self)), k), indices[:, 1:].ravel()]).astype(np.int32)
+
+    def graph(self, k, subset=None, include_self=False):
+        """
+        Function that returns the k nearest neighbors graph as a sparse matrix of distances.
+
+        Parameters
+        ----------
+        k : int
+            The number of neighbors (the observation itself excluded).
+        subset : list
+            If not None, the graph is restricted to these observations : their neighbors outside of the subset are dropped.
+        include_self : bool
+            If True, each observation is also stored as its own neighbor, at a distance of 0 (the format of `sklearn.neighbors.KNeighborsTransformer`, expected by t-SNE).
+
+        Returns
+        -------
+        scipy sparse matrix
+            The graph, of shape (n, n), or (len(subset), len(subset)).
+        """
+        indices, distances = self.knn(k + 1)
+        if include_self:
+            k += 1
+        else:
+            indices, distances = indices[:, 1:], distances[:, 1:]
+        if subset is None:
+            n = len(self)
+            rows = np.repeat(np.arange(n), k)
+            return scipy.sparse.csr_matrix((distances.ravel(), (rows, indices.ravel())), shape=(n, n))
+        subset = np.asarray(subset)
+        position = np.full(len(self), -1)
+        position[subset] = np.arange(len(subset))
+        columns = position[indices[subset]]
+        rows = np.repeat(np.arange(len(subset)), k)
+        kept = columns.ravel() >= 0
+        return scipy.sparse.csr_matrix(
+            (distances[subset].ravel()[kept], (rows[kept], columns.ravel()[kept])), shape=(len(subset), len(subset))
+        )
@@ -4,13 +4,15 @@ Class potato (selection) and functions to create a potato from a json file.
 
 import pandas as pd
 import numpy as np
-from skrules import SkopeRules
 
 import json as JSON
 from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor
 
 # from antakia.antakia import AntakIA
 from antakia.dataset import Dataset
+from antakia.rules import rules_mask, positions_mask, filter_rules, make_rule_learner, SKOPE_PARAMS
+from antakia.cache import fingerprint_data, fingerprint_mask, make_key
 
 class Potato():
     """
@@ -21,8 +23,10 @@ class Potato():
     ----------
     atk : AntakIA object
         The AntakIA object linked to the potato.
+    mask : numpy array
+        The boolean mask of the points of the dataset in the selection.
     indexes : list
-        The list of the indexes of the points in the dataset.
+        The list of the indexes of the points in the dataset. It is built from `mask` only when it is asked.
     dataset : Dataset object
         The Dataset object containing the data of the selection.
     data : pandas dataframe
@@ -41,8 +45,8 @@ class Potato():
         The score of the surrogate-model in the explanation space. Is the following format : (precision, recall, extract of the tree).
     success : bool
         True if the rules have been found, False otherwise.
-    y_train : list
-        The list of the target values of the dataset.
+    y_train : numpy array
+        The membership of the points of the dataset to the selection (1 or 0), used as target to find rules.
     explain : dict
         The dict containing the explanations of the selection. Is the following format : {"Imported": imported explanations, "SHAP": SHAP explanations, "LIME": LIME explanations}.
     state : int
@@ -73,11 +77,13 @@ class Potato():
         if not isinstance(atk, antakia.AntakIA):
             raise ValueError("You must provide an AntakIA object")
         self.atk = atk
+        atk.potatoes.add(self)
         self.state = Potato.UNKNOWN
 
-        if json_path is not None and array != []:
+        if json_path is not None and len(array) > 0:
             raise ValueError("You can't provide a list and a json file")
-        
+
+        self.dataset = atk.dataset
         if json_path is not None:
             self.state = Potato.JSON
             if json_path[-5:] != ".json":
@@ -88,15 +94,6 @@ class Potato():
         else :
             self.indexes = array
 
-        self.dataset = atk.dataset
-        if self.dataset.X is not None:
-            self.data = self.dataset.X.iloc[self.indexes]
-        else :
-            self.data = None
-        if self.dataset.y is not None:
-            self.y = self.dataset.y.iloc[self.indexes]
-        else :
-            self.y = None
         self.sub_model = {"model": None, "score": None}
 
         self.rules = None
@@ -107,22 +104,92 @@ class Potato():
 
         self.success = None
 
-        self.y_train = []
-        for i in range(len(self.dataset.X)):
-            if i in self.indexes:
-                self.y_train.append(1)
-            else :
-                self.y_train.append(0)
-
         self.indexes_from_map = None
 
-        self.explain = {"Imported": None, "SHAP": None, "LIME": None}
-        if self.atk.explain["Imported"] is not None:
-            self.explain["Imported"] = self.atk.explain["Imported"].iloc[self.indexes]
-        if self.atk.explain["SHAP"] is not None:
-            self.explain["SHAP"] = self.atk.explain["SHAP"].iloc[self.indexes]
-        if self.atk.explain["LIME"] is not None:
-            self.explain["LIME"] = self.atk.explain["LIME"].iloc[self.indexes]
+    @property
+    def mask(self) -> np.ndarray:
+        return self.__mask
+
+    @mask.setter
+    def mask(self, mask):
+        self.__mask = np.asarray(mask, dtype=bool)
+        # what is derived from the mask is built again when it is asked
+        self.__indexes = None
+        self.__size = None
+        self.__views = {}
+
+    @property
+    def indexes(self) -> list:
+        if self.__indexes is None:
+            self.__indexes = np.flatnonzero(self.__mask).tolist()
+        return self.__indexes
+
+    @indexes.setter
+    def indexes(self, indexes):
+        self.mask = positions_mask(indexes, len(self.dataset.X))
+
+    @property
+    def y_train(self) -> np.ndarray:
+        return self.__mask.astype(int)
+
+    def resize(self, n:int) -> None:
+        """
+        Function that adapts the selection to a dataset of `n` points, after new observations have been appended : the new points are not selected.
+
+        Parameters
+        ----------
+        n : int
+            The new number of points of the dataset.
+        """
+        if n > len(self.__mask):
+            self.mask = np.concatenate([self.__mask, np.zeros(n - len(self.__mask), dtype=bool)])
+
+    def __view(self, name, frame):
+        # the rows of the selection in a dataframe of the dataset, computed once per mask and per dataframe
+        # (a dataframe replaced in the dataset or in the explanations gives a new view)
+        if frame is None:
+            return None
+        if name not in self.__views or self.__views[name][0] is not frame:
+            self.__views[name] = (frame, frame.iloc[self.__mask] if len(frame) == len(self.__mask) else frame.iloc[self.indexes])
+        return self.__views[name][1]
+
+    @property
+    def data(self) -> pd.DataFrame:
+        return self.__view("X", self.dataset.X)
+
+    @property
+    def y(self) -> pd.Series:
+        return self.__view("y", self.dataset.y)
+
+    @property
+    def explain(self) -> dict:
+        return {method: self.__view(method, self.atk.explain[method]) for method in ["Imported", "SHAP", "LIME"]}
+
+    def __contains__(self, index) -> bool:
+        return bool(self.__mask[index])
+
+    def __combine(self, mask):
+        potato = Potato(self.atk, [])
+        potato.mask = mask
+        return potato
+
+    def union(self, other):
+        """
+        Function that returns the union of two potatoes, as a new potato.
+        """
+        return self.__combine(self.__mask | other.mask)
+
+    def intersection(self, other):
+        """
+        Function that returns the intersection of two potatoes, as a new potato.
+        """
+        return self.__combine(self.__mask & other.mask)
+
+    def difference(self, other):
+        """
+        Function that returns the points of this potato that are not in `other`, as a new potato.
+        """
+        return self.__combine(self.__mask & ~other.mask)
 
     def __str__(self) -> str:
         text = ' '.join(("Potato:\n",
@@ -142,7 +209,9 @@ class Potato():
         int
             The length of the potato.
         """
-        return len(self.indexes)
+        if self.__size is None:
+            self.__size = int(np.count_nonzero(self.__mask))
+        return self.__size
     
     def size(self) -> int:
         """
@@ -153,7 +222,7 @@ class Potato():
         tuple
             The shape of the potato.
         """
-        return len(self.indexes)
+        return len(self)
     
     def stateToSring(self)-> str :
         """
@@ -190,58 +259,22 @@ class Potato():
 
         Parameters
         ----------
-        indexes : list
-            The new indexes of the potato.
+        indexes : list or numpy array
+            The new indexes of the potato, or its boolean mask.
         """
         self.indexes = indexes
-        self.data = self.dataset.X.iloc[self.indexes]
-        self.y = self.dataset.y.iloc[self.indexes]
-
-        self.y_train = []
-        for i in range(len(self.dataset.X)):
-            if i in self.indexes:
-                self.y_train.append(1)
-            else :
-                self.y_train.append(0)
-
         self.state = Potato.LASSO
         self.success = None
 
-        self.explain = {"Imported": None, "SHAP": None, "LIME": None}
-        if self.atk.explain["Imported"] is not None:
-            self.explain["Imported"] = self.atk.explain["Imported"].iloc[self.indexes]
-        if self.atk.explain["SHAP"] is not None:
-            self.explain["SHAP"] = self.atk.explain["SHAP"].iloc[self.indexes]
-        if self.atk.explain["LIME"] is not None:
-            self.explain["LIME"] = self.atk.explain["LIME"].iloc[self.indexes]
-
     def setJsonPath(self, json_path:str) -> None:
         if json_path[-5:] != ".json":
             json_path += ".json"
         fileObject = open(json_path, "r")
         jsonContent = fileObject.read()
         self.indexes = JSON.loads(jsonContent)
-        self.data = self.dataset.X.iloc[self.indexes]
-        self.y = self.dataset.y.iloc[self.indexes]
-
-        self.y_train = []
-        for i in range(len(self.dataset.X)):
-            if i in self.indexes:
-                self.y_train.append(1)
-            else :
-                self.y_train.append(0)
-
         self.state = Potato.JSON
         self.success = None
 
-        self.explain = {"Imported": None, "SHAP": None, "LIME": None}
-        if self.atk.explain["Imported"] is not None:
-            self.explain["Imported"] = self.atk.explain["Imported"].iloc[self.indexes]
-        if self.atk.explain["SHAP"] is not None:
-            self.explain["SHAP"] = self.atk.explain["SHAP"].iloc[self.indexes]
-        if self.atk.explain["LIME"] is not None:
-            self.explain["LIME"] = self.atk.explain["LIME"].iloc[self.indexes]
-
 
     def getVSdata(self) -> pd.DataFrame:
         """
@@ -317,6 +350,12 @@ class Potato():
     def applyRules(self, to_return:bool=False):
         """
         Function that applies the rules to the dataset, in order to create a new selection.
+        The rules on the same feature are joined with OR, the features with AND (see `antakia.rules.rules_mask`).
+
+        Parameters
+        ----------
+        to_return : bool
+            If True, the mask of the points respecting the rules is returned instead of being set as the new selection.
 
         Examples
         --------
@@ -331,41 +370,10 @@ class Potato():
 
         """
         self.state = Potato.SKR
-        """
-        rules = self.rules
-        df = self.dataset.X
-        for i in range(len(rules)):
-            regle1 = "df.loc[" + str(rules[i][0]) + rules[i][1] + "df['" + rules[i][2] + "']]"
-            regle2 = "df.loc[" + "df['" + rules[i][2] + "']" + rules[i][3] + str(rules[i][4]) + "]"
-            df = eval(regle1)
-            df = eval(regle2)
-        self.data = df
-        self.setIndexes(df.index)
-        """
-        solo_features = list(set([self.rules[i][2] for i in range(len(self.rules))]))
-        nombre_features_rules = []
-        for i in range(len(solo_features)):
-            nombre_features_rules.append([])
-        for i in range(len(self.rules)):
-            nombre_features_rules[solo_features.index(self.rules[i][2])].append(self.rules[i])
-
-        nouvelle_tuile = self.atk.dataset.X.index
-        for i in range(len(nombre_features_rules)):
-            nouvelle_tuile_temp = []
-            for j in range(len(nombre_features_rules[i])):
-                X_temp = self.atk.dataset.X[
-                    (self.atk.dataset.X[nombre_features_rules[i][j][2]] >= nombre_features_rules[i][j][0])
-                    & (self.atk.dataset.X[nombre_features_rules[i][j][2]] <= nombre_features_rules[i][j][4])
-                ].index
-                nouvelle_tuile_temp = list(nouvelle_tuile_temp) + list(X_temp)
-                nouvelle_tuile_temp = list(set(nouvelle_tuile_temp))
-            nouvelle_tuile = [g for g in nouvelle_tuile if g in nouvelle_tuile_temp]
-
-        if self.indexes_from_map is not None:
-            nouvelle_tuile = [g for g in nouvelle_tuile if g in self.indexes_from_map]
+        mask = rules_mask(self.dataset.X, self.rules, self.indexes_from_map, self.dataset.sortedColumn)
         if to_return:
-            return nouvelle_tuile
-        self.setIndexes(nouvelle_tuile)
+            return mask
+        self.setIndexes(mask)
 
     def setIndexesFromMap(self, indexes:list) -> None:
         """
@@ -427,10 +435,10 @@ class Potato():
     def __error_message(self, message:str):
         print("AntakIA ERROR : " + message)
 
-    def applySkope(self, explanation, p:float = 0.7, r:float = 0.7):
+    def fitSkope(self, explanation, p:float = 0.7, r:float = 0.7, y_train=None, on_fitted=None, rule_engine:str = "skope") -> dict:
         """
-        Function that applies the skope-rules algorithm to the dataset, in order to create a new selection.
-        Must be connected to the AntakIA object (for the explanation space).
+        Function that finds the rules of the selection with the skope-rules algorithm, in the value space and in the explanation space at the same time, without modifying the potato.
+        The rules found are kept in the `skope_cache` of the AntakIA object : asking again for the same selection, explanation, precision and recall is instant.
 
         Parameters
         ----------
@@ -440,47 +448,94 @@ class Potato():
             The minimum precision of the rules.
         r : float = 0.7
             The minimum recall of the rules.
+        y_train : numpy array
+            The membership of the points to the selection. If None, the current selection is used.
+        on_fitted : callable
+            If not None, called with "VS" or "ES" as soon as the rules of this space are found.
+        rule_engine : str
+            The rule learner : "skope" for SkopeRules, "native" for the faster `antakia.rules.IntervalRules`.
+
+        Returns
+        -------
+        dict
+            The rules and the scores, in the format {"rules", "score", "rules_exp", "score_exp"} (see `setSkopeResult`). The rules are None if no rule was found.
         """
         if self.atk.explain[explanation] is None:
             raise ValueError("You must provide a valid explanation space")
-        y_train = np.zeros(len(self.dataset.X))
-        y_train[self.indexes] = 1
-
-        skope_rules_clf = SkopeRules(
-            feature_names=self.dataset.X.columns,
-            random_state=42,
-            n_estimators=5,
-            recall_min=r,
-            precision_min=p,
-            max_depth_duplication=0,
-            max_samples=1.0,
-            max_depth=3,
-        )
-        skope_rules_clf.fit(self.dataset.X, y_train)
-
-        skope_rules_clf_exp = SkopeRules(
-            feature_names=self.atk.explain[explanation].columns,
-            random_state=42,
-            n_estimators=5,
-            recall_min=r,
-            precision_min=p,
-            max_depth_duplication=0,
-            max_samples=1.0,
-            max_depth=3,
-        )
-        skope_rules_clf_exp.fit(self.atk.explain[explanation], y_train)
-        if skope_rules_clf.rules_ == [] or skope_rules_clf_exp.rules_ == []:
+        if y_train is None:
+            y_train = self.y_train
+        spaces = {"VS": self.dataset.X, "ES": self.atk.explain[explanation]}
+
+        # the rules already found for this selection are reused, as long as the data and the explanations are the same
+        params = SKOPE_PARAMS if rule_engine == "skope" else None
+        key = make_key(rule_engine, fingerprint_data(spaces["VS"]), fingerprint_data(spaces["ES"]), fingerprint_mask(y_train), explanation, p, r, params)
+        result = self.atk.skope_cache.get(key)
+        if result is not None:
+            if on_fitted is not None:
+                for space in spaces:
+                    on_fitted(space)
+            return deepcopy(result)
+
+        def fit(space):
+            skope_rules_clf = make_rule_learner(rule_engine, spaces[space].columns, p, r)
+            skope_rules_clf.fit(spaces[space], y_train)
+            if on_fitted is not None:
+                on_fitted(space)
+            return skope_rules_clf.rules_
+
+        # the two spaces are fitted at the same time
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = {space: executor.submit(fit, space) for space in spaces}
+            rules = {space: future.result() for space, future in futures.items()}
+        if rules["VS"] == [] or rules["ES"] == []:
+            result = {"rules": None, "score": None, "rules_exp": None, "score_exp": None}
+        else:
+            result = {}
+            result["rules"], result["score"] = self.__transform_rules(rules["VS"], spaces["VS"])
+            result["rules_exp"], result["score_exp"] = self.__transform_rules(rules["ES"], spaces["ES"])
+        self.atk.skope_cache.set(key, deepcopy(result))
+        return result
+
+    def setSkopeResult(self, result:dict):
+        """
+        Function that sets the rules found by `fitSkope`, and applies them to create the new selection.
+
+        Parameters
+        ----------
+        result : dict
+            The result of `fitSkope`.
+        """
+        if result["rules"] is None:
             self.rules, self.score_skope, self.rules_exp, self.score_skope_exp = None, None, None, None
             self.success = False
             self.__error_message("No rules found for this precision and recall")
         else :
-            self.rules, self.score = self.__transform_rules(skope_rules_clf.rules_, self.dataset.X)
-            self.rules_exp, self.score_exp = self.__transform_rules(skope_rules_clf_exp.rules_, self.atk.explain[explanation])
+            self.rules, self.score = result["rules"], result["score"]
+            self.rules_exp, self.score_exp = result["rules_exp"], result["score_exp"]
             self.checkForDuplicates()
             self.applyRules()
             self.success = True
             self.state = Potato.SKR
 
+    def applySkope(self, explanation, p:float = 0.7, r:float = 0.7, rule_engine:str = "skope"):
+        """
+        Function that applies the skope-rules algorithm to the dataset, in order to create a new selection.
+        Must be connected to the AntakIA object (for the explanation space).
+        To find the rules without freezing the interface, see `compute.SkopeTask`.
+
+        Parameters
+        ----------
+        explanation : str
+            The name of the explanation to use.
+        p : float = 0.7
+            The minimum precision of the rules.
+        r : float = 0.7
+            The minimum recall of the rules.
+        rule_engine : str
+            The rule learner : "skope" for SkopeRules, "native" for the faster `antakia.rules.IntervalRules`.
+        """
+        self.setSkopeResult(self.fitSkope(explanation, p, r, rule_engine=rule_engine))
+
     def checkForDuplicates(self):
         """
         Function that checks if there are duplicates in the rules.
@@ -587,13 +642,7 @@ class Potato():
         pandas dataframe
             The dataframe containing the points of the dataset that respect only one rule of the list of rules.
         """
-        rules = self.rules
-        df = deepcopy(self.dataset.X)
-        regle1 = "df.loc[" + str(rules[index][0]) + rules[index][1] + "df['" + rules[index][2] + "']]"
-        regle2 = "df.loc[" + "df['" + rules[index][2] + "']" + rules[index][3] + str(rules[index][4]) + "]"
-        df = eval(regle1)
-        df = eval(regle2)
-        return df
+        return filter_rules(self.dataset.X, [self.rules[index]], output="view", index=self.dataset.sortedColumn)
     
     def toJson(self):
         """
@@ -0,0 +1,161 @@
+"""
+Regions module for the antakia package : all the regions are handled together, as a label vector over the dataset.
+"""
+
+import numpy as np
+
+from antakia.rules import filter_rule_sets, positions_mask
+
+# above this number of observations, the overlaps are counted by blocks of rows
+BLOCK = 65536
+
+
+class RegionSet():
+    """
+    A set of regions of the dataset, evaluated together.
+    When the regions overlap, a point is labeled with the last region containing it (a new region takes the points of the older ones).
+
+    Attributes
+    ----------
+    masks : numpy array
+        The boolean masks of the regions, shape (n, number of regions).
+    labels : numpy array
+        The region of each point (-1 if the point is in no region).
+    overlaps : numpy array
+        The number of points shared by each pair of regions, shape (number of regions, number of regions). The diagonal is the size of each region.
+    """
+    def __init__(self, masks):
+        """
+        Constructor of the class RegionSet.
+
+        Parameters
+        ----------
+        masks : list or numpy array
+            The boolean masks of the regions : a list of masks of length n, or an array of shape (n, number of regions).
+        """
+        if isinstance(masks, list):
+            masks = np.column_stack(masks) if len(masks) > 0 else np.zeros((0, 0), dtype=bool)
+        self.masks = np.asarray(masks, dtype=bool)
+        self.labels = np.full(self.masks.shape[0], -1)
+        for j in range(self.masks.shape[1]):
+            self.labels[self.masks[:, j]] = j
+        self.__overlaps = None
+
+    @classmethod
+    def fromRules(cls, X, rule_sets, index=None):
+        """
+        Function that evaluates the rules of all the regions in one pass (a rule shared by several regions is evaluated once).
+
+        Parameters
+        ----------
+        X : pandas dataframe
+            The data.
+        rule_sets : list
+            The list of rules of each region.
+        index : function
+            If not None, a function that returns the `ColumnIndex` of a column (see `antakia.rules.rules_mask`).
+
+        Returns
+        -------
+        RegionSet object
+            The regions.
+        """
+        return cls(filter_rule_sets(X, rule_sets, output="mask", index=index))
+
+    @classmethod
+    def fromRegions(cls, regions, apply_rules=False):
+        """
+        Function that builds the set from a list of Potato objects.
+
+        Parameters
+        ----------
+        regions : list
+            The list of the regions (Potato objects), all on the same dataset.
+        apply_rules : bool
+            If True, the regions with rules are evaluated from their rules (in one pass) instead of their current selection.
+
+        Returns
+        -------
+        RegionSet object
+            The regions.
+        """
+        masks = [region.mask for region in regions]
+        if apply_rules:
+            with_rules = [j for j, region in enumerate(regions) if region.rules is not None]
+            if len(with_rules) > 0:
+                dataset = regions[with_rules[0]].dataset
+                rule_masks = filter_rule_sets(
+                    dataset.X, [regions[j].rules for j in with_rules], output="mask", index=dataset.sortedColumn
+                )
+                for j, mask in zip(with_rules, rule_masks):
+                    if regions[j].indexes_from_map is not None:
+                        mask = mask & positions_mask(regions[j].indexes_from_map, len(mask))
+                    masks[j] = mask
+        return cls(masks)
+
+    def __len__(self):
+        return self.masks.shape[1]
+
+    @property
+    def overlaps(self) -> np.ndarray:
+        if self.__overlaps is None:
+            n, r = self.masks.shape
+            overlaps = np.zeros((r, r), dtype=np.int64)
+            # float32 products are exact for blocks smaller than 2**24 rows
+            for start in range(0, n, BLOCK):
+                block = self.masks[start:start + BLOCK].astype(np.float32)
+                overlaps += (block.T @ block).astype(np.int64)
+            self.__overlaps = overlaps
+        return self.__overlaps
+
+    def sizes(self) -> np.ndarray:
+        """
+        Function that returns the number of points labeled with each region.
+        """
+        return np.bincount(self.labels[self.labels >= 0], minlength=len(self))
+
+    def conflicts(self) -> bool:
+        """
+        Function that tells if some regions share points.
+        """
+        overlaps = self.overlaps
+        return bool((overlaps.sum() - np.trace(overlaps)) > 0)
+
+    def uncovered(self) -> np.ndarray:
+        """
+        Function that returns the mask of the points in no region.
+        """
+        return self.labels < 0
+
+    def __groups(self):
+        # the points sorted by label, and the bounds of each region in this order
+        order = np.argsort(self.labels, kind="stable")
+        return order, np.searchsorted(self.labels[order], np.arange(len(self) + 1))
+
+    def positions(self) -> list:
+        """
+        Function that returns the positions of the points of each region, according to the labels.
+
+        Returns
+        -------
+        list
+            The sorted positions of the points of each region.
+        """
+        order, bounds = self.__groups()
+        return [order[bounds[j]:bounds[j + 1]] for j in range(len(self))]
+
+    def split(self, frame) -> list:
+        """
+        Function that splits a dataframe (or a series) of the dataset by region, according to the labels : the rows of each region are taken once from the frame.
+
+        Parameters
+        ----------
+        frame : pandas dataframe or series
+            The frame, with one row per point of the dataset.
+
+        Returns
+        -------
+        list
+            The rows of each region, with their index in the frame.
+        """
+        return [frame.iloc[positions] for positions in self.positions()]
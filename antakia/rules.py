@@ -0,0 +1,405 @@
+"""
+Rules module for the antakia package : the rules of the selections are evaluated as vectorized boolean masks.
+
+A rule has the following format : [minimum, operator1, column, operator2, maximum], for example [0.5, '<=', 'cool_feature', '<=', 0.7]. The operators are '<=' or '<'.
+In a list of rules, the rules on the same feature are joined with OR, and the rules on different features with AND.
+The rules of a selection are learned by SkopeRules, or by `IntervalRules`, a faster learner specialized for these rules (see `make_rule_learner`).
+"""
+
+import numpy as np
+import pandas as pd
+from skrules import SkopeRules
+
+LOWER = {"<=": np.less_equal, "<": np.less}
+OUTPUTS = ["mask", "indices", "view"]
+RULE_ENGINES = ["skope", "native"]
+# the hyperparameters of the skope-rules algorithm
+SKOPE_PARAMS = {"random_state": 42, "n_estimators": 5, "max_depth_duplication": 0, "max_samples": 1.0, "max_depth": 3}
+
+
+def group_rules(rules) -> dict:
+    """Return the rules grouped by feature.
+
+    Parameters
+    ---------
+    rules : list
+        The list of rules.
+
+    Returns
+    -------
+    dict
+        The rules of each feature, in the order of their first appearance : {column: [rule, ...]}.
+    """
+    groups = {}
+    for rule in rules:
+        groups.setdefault(rule[2], []).append(rule)
+    return groups
+
+
+def interval_mask(values, rule) -> np.ndarray:
+    """Return the mask of the values that respect one rule.
+
+    Parameters
+    ---------
+    values : numpy array
+        The values of the column of the rule.
+    rule : list
+        The rule, [minimum, operator1, column, operator2, maximum].
+
+    Returns
+    -------
+    numpy array
+        The boolean mask.
+    """
+    if rule[1] not in LOWER or rule[3] not in LOWER:
+        raise ValueError("Unknown operator in the rule " + str(rule))
+    mask = LOWER[rule[1]](rule[0], values)
+    mask &= LOWER[rule[3]](values, rule[4])
+    return mask
+
+
+def rules_mask(X, rules, restrict=None, index=None, join:str = "or") -> np.ndarray:
+    """Return the mask of the rows of X that respect a list of rules.
+
+    Parameters
+    ---------
+    X : pandas dataframe
+        The data.
+    rules : list
+        The list of rules. The rules on the same feature are joined with `join`, the features with AND.
+    restrict : list or numpy array
+        If not None, the positions (or the boolean mask) of the only rows that can be selected, for example the points selected on a map.
+    index : function
+        If not None, a function that returns the `ColumnIndex` of a column (for example `Dataset.sortedColumn`), used instead of scanning the column.
+    join : str
+        "or" or "and" : how the rules on the same feature are joined.
+
+    Returns
+    -------
+    numpy array
+        The boolean mask of the rows, of length len(X).
+
+    Examples
+    --------
+    >>> X = pd.DataFrame({'a': [1, 2, 3, 4, 5, 2.5], 'b': [0.1, 0.2, 0.3, 0.4, 0.5, 0.33]})
+    >>> rules_mask(X, [[1.5, '<=', 'a', '<=', 3], [0.1, '<=', 'b', '<=', 0.4]])
+    array([False,  True,  True, False, False,  True])
+    """
+    return _rules_mask(X, rules, restrict, index, join, None)
+
+
+def _rule_mask(X, rule, index, memo):
+    # the mask of one rule, shared by all the rule sets evaluated together (it must not be modified)
+    key = (rule[2], rule[0], rule[1], rule[3], rule[4])
+    if memo is not None and key in memo:
+        return memo[key]
+    mask = None
+    if index is not None:
+        column_index = index(rule[2])
+        start, stop = column_index.range(rule)
+        # scattering the rows is faster than scanning the column only for narrow intervals
+        if stop - start < len(X) // 4:
+            mask = np.zeros(len(X), dtype=bool)
+            mask[column_index.order[start:stop]] = True
+    if mask is None:
+        mask = interval_mask(X[rule[2]].to_numpy(), rule)
+    if memo is not None:
+        memo[key] = mask
+    return mask
+
+
+def _rules_mask(X, rules, restrict, index, join, memo):
+    if join not in ["or", "and"]:
+        raise ValueError("join must be 'or' or 'and'")
+    mask = np.ones(len(X), dtype=bool)
+    for column_rules in group_rules(rules or []).values():
+        if join == "and":
+            for rule in column_rules:
+                mask &= _rule_mask(X, rule, index, memo)
+            continue
+        column_mask = _rule_mask(X, column_rules[0], index, memo)
+        if len(column_rules) > 1:
+            column_mask = column_mask.copy()
+            for rule in column_rules[1:]:
+                column_mask |= _rule_mask(X, rule, index, memo)
+        mask &= column_mask
+    if restrict is not None:
+        mask &= positions_mask(restrict, len(X))
+    return mask
+
+
+def _output(X, mask, output):
+    if output == "mask":
+        return mask
+    if output == "indices":
+        return np.flatnonzero(mask)
+    return X[mask] if isinstance(X, (pd.DataFrame, pd.Series)) else np.asarray(X)[mask]
+
+
+def filter_rules(X, rules, output:str = "view", restrict=None, index=None, join:str = "or"):
+    """Return the rows of X that respect a list of rules.
+
+    Parameters
+    ---------
+    X : pandas dataframe
+        The data.
+    rules : list
+        The list of rules. The rules on the same feature are joined with `join`, the features with AND.
+    output : str
+        "mask" for the boolean mask of the rows, "indices" for their positions, "view" for the rows of X themselves.
+    restrict, index, join
+        See `rules_mask`.
+
+    Returns
+    -------
+    numpy array or pandas dataframe
+        The mask, the positions or the rows of X (with their index).
+
+    Examples
+    --------
+    >>> X = pd.DataFrame({'a': [1, 2, 3, 4, 5, 2.5], 'b': [0.1, 0.2, 0.3, 0.4, 0.5, 0.33]})
+    >>> filter_rules(X, [[1.5, '<=', 'a', '<=', 3], [0.1, '<=', 'b', '<=', 0.4]], output="indices")
+    array([1, 2, 5])
+    """
+    if output not in OUTPUTS:
+        raise ValueError("output must be one of " + str(OUTPUTS))
+    return _output(X, rules_mask(X, rules, restrict, index, join), output)
+
+
+def filter_rule_sets(X, rule_sets, output:str = "mask", index=None, join:str = "or") -> list:
+    """Return the rows of X that respect each of several lists of rules, in one pass : a rule used by several lists is evaluated only once.
+
+    Parameters
+    ---------
+    X : pandas dataframe
+        The data.
+    rule_sets : list
+        The lists of rules (None or an empty list selects all the rows).
+    output, index, join
+        See `filter_rules`.
+
+    Returns
+    -------
+    list
+        The result of `filter_rules` for each list of rules.
+    """
+    if output not in OUTPUTS:
+        raise ValueError("output must be one of " + str(OUTPUTS))
+    memo = {}
+    return [_output(X, _rules_mask(X, rules, None, index, join, memo), output) for rules in rule_sets]
+
+
+def positions_mask(positions, n) -> np.ndarray:
+    """Return the boolean mask of length n of a list of positions (a boolean mask is returned as it is).
+    """
+    positions = np.asarray(positions)
+    if positions.dtype == bool:
+        return positions
+    mask = np.zeros(n, dtype=bool)
+    mask[positions.astype(int)] = True
+    return mask
+
+
+class ColumnIndex():
+    """
+    The values of a column, sorted once, to find the rows in an interval in O(log n + k) instead of scanning the column.
+
+    Attributes
+    ----------
+    order : numpy array
+        The positions of the rows, sorted by value.
+    values : numpy array
+        The sorted values of the column.
+    """
+    def __init__(self, values):
+        """
+        Constructor of the class ColumnIndex.
+
+        Parameters
+        ----------
+        values : numpy array or pandas series
+            The values of the column.
+        """
+        values = np.asarray(values)
+        self.order = np.argsort(values, kind="stable")
+        self.values = values[self.order]
+
+    def __len__(self):
+        return len(self.order)
+
+    def range(self, rule) -> tuple:
+        """
+        Function that returns the positions, in the sorted values, of the rows that respect a rule.
+
+        Parameters
+        ----------
+        rule : list
+            The rule, [minimum, operator1, column, operator2, maximum] (the column is not used).
+
+        Returns
+        -------
+        tuple
+            (start, stop) : the rows are `order[start:stop]`.
+        """
+        if rule[1] not in LOWER or rule[3] not in LOWER:
+            raise ValueError("Unknown operator in the rule " + str(rule))
+        start = np.searchsorted(self.values, rule[0], "right" if rule[1] == "<" else "left")
+        stop = np.searchsorted(self.values, rule[4], "left" if rule[3] == "<" else "right")
+        return start, max(start, stop)
+
+    def between(self, rule) -> np.ndarray:
+        """
+        Function that returns the (sorted) values that respect a rule.
+        """
+        start, stop = self.range(rule)
+        return self.values[start:stop]
+
+    def indices(self, rule) -> np.ndarray:
+        """
+        Function that returns the positions of the rows that respect a rule (not sorted).
+        """
+        start, stop = self.range(rule)
+        return self.order[start:stop]
+
+    def mask(self, rule) -> np.ndarray:
+        """
+        Function that returns the boolean mask of the rows that respect a rule.
+        """
+        mask = np.zeros(len(self), dtype=bool)
+        mask[self.indices(rule)] = True
+        return mask
+
+
+def make_rule_learner(rule_engine:str = "skope", feature_names=None, precision_min:float = 0.5, recall_min:float = 0.5):
+    """Return a rule learner : an object with a `fit(X, y)` method, that sets `rules_` in the format of SkopeRules.
+
+    Parameters
+    ---------
+    rule_engine : str
+        "skope" for SkopeRules (bagging of decision trees), "native" for `IntervalRules`.
+    feature_names : list
+        The names of the features.
+    precision_min, recall_min : float
+        The minimum precision and recall of the rules.
+
+    Returns
+    -------
+    SkopeRules or IntervalRules object
+        The learner, not fitted.
+    """
+    if rule_engine == "skope":
+        return SkopeRules(feature_names=feature_names, precision_min=precision_min, recall_min=recall_min, **SKOPE_PARAMS)
+    if rule_engine == "native":
+        return IntervalRules(feature_names, precision_min, recall_min, max_depth=SKOPE_PARAMS["max_depth"])
+    raise ValueError("rule_engine must be one of " + str(RULE_ENGINES))
+
+
+class IntervalRules():
+    """
+    A rule learner specialized for the rules of AntakIA : a conjunction of intervals on at most `max_depth` features.
+    Each column is cut once in `n_bins` quantile bins. The box is then built greedily : at each step, the interval of bins (on a feature not used yet) that best improves the F1-score of the box is added, all the intervals of a feature being scored at once from cumulative histograms.
+
+    Attributes
+    ----------
+    feature_names : list
+        The names of the features.
+    precision_min, recall_min : float
+        The minimum precision and recall of the rule.
+    max_depth : int
+        The maximum number of features in the rule.
+    n_bins : int
+        The number of bins of each column.
+    rules_ : list
+        After `fit` : [(rule, (precision, recall, number of features))], as in SkopeRules, or [] if the rule found is not precise enough or does not cover enough points.
+        The rule is a string like "a > 0.1 and a <= 0.4 and b <= 2.0".
+    """
+    def __init__(self, feature_names=None, precision_min:float = 0.5, recall_min:float = 0.5, max_depth:int = 3, n_bins:int = 32):
+        """
+        Constructor of the class IntervalRules.
+        """
+        self.feature_names = feature_names
+        self.precision_min = precision_min
+        self.recall_min = recall_min
+        self.max_depth = max_depth
+        self.n_bins = n_bins
+        self.rules_ = []
+
+    def __binning(self, X):
+        # the thresholds of each column, and the bin of each value : bin c holds the values in ]thresholds[c-1], thresholds[c]]
+        quantiles = np.linspace(0, 1, self.n_bins + 1)[1:-1]
+        thresholds, codes = [], np.zeros(X.shape, dtype=np.int16)
+        for f in range(X.shape[1]):
+            column = X[:, f]
+            t = np.unique(np.nanquantile(column, quantiles)) if len(column) > 0 else np.array([])
+            thresholds.append(t)
+            codes[:, f] = np.searchsorted(t, column, "left")
+        return thresholds, codes
+
+    def fit(self, X, y):
+        """
+        Function that finds the rule of the points with y = 1.
+
+        Parameters
+        ----------
+        X : pandas dataframe or numpy array
+            The data.
+        y : list or numpy array
+            1 for the points to describe, 0 for the others.
+
+        Returns
+        -------
+        IntervalRules object
+            The learner, fitted.
+        """
+        names = self.feature_names if self.feature_names is not None else getattr(X, "columns", range(np.shape(X)[1]))
+        names = [str(name) for name in names]
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y).astype(bool)
+        self.rules_ = []
+        n_positives = np.count_nonzero(y)
+        if n_positives == 0 or n_positives == len(y):
+            return self
+        thresholds, codes = self.__binning(X)
+
+        box = np.ones(len(y), dtype=bool)
+        best_f1 = 2 * n_positives / (len(y) + n_positives)
+        conditions = []
+        for _ in range(self.max_depth):
+            best = None
+            for f in range(X.shape[1]):
+                if f in [c[0] for c in conditions]:
+                    continue
+                n_codes = len(thresholds[f]) + 1
+                # the points and the positive points of the box in each bin, cumulated
+                total = np.concatenate([[0], np.cumsum(np.bincount(codes[box, f], minlength=n_codes))])
+                positives = np.concatenate([[0], np.cumsum(np.bincount(codes[box & y, f], minlength=n_codes))])
+                # all the intervals [a, b] of bins at once
+                tp = positives[None, 1:] - positives[:-1, None]
+                selected = total[None, 1:] - total[:-1, None]
+                valid = np.triu(np.ones((n_codes, n_codes), dtype=bool)) & (tp >= self.recall_min * n_positives)
+                f1 = np.where(valid, 2 * tp / np.maximum(selected + n_positives, 1), -1)
+                a, b = np.unravel_index(np.argmax(f1), f1.shape)
+                if f1[a, b] > best_f1 + 1e-12 and (best is None or f1[a, b] > best[0]):
+                    best = (f1[a, b], f, a, b)
+            if best is None:
+                break
+            best_f1, f, a, b = best
+            conditions.append((f, a, b))
+            box &= (codes[:, f] >= a) & (codes[:, f] <= b)
+
+        if len(conditions) == 0:
+            return self
+        tp = np.count_nonzero(box & y)
+        precision, recall = tp / max(np.count_nonzero(box), 1), tp / n_positives
+        if precision < self.precision_min or recall < self.recall_min:
+            return self
+        terms = []
+        for f, a, b in conditions:
+            if a > 0:
+                terms.append(names[f] + " > " + str(thresholds[f][a - 1]))
+            if b < len(thresholds[f]):
+                terms.append(names[f] + " <= " + str(thresholds[f][b]))
+        if len(terms) == 0:
+            return self
+        self.rules_ = [(" and ".join(terms), (precision, recall, len(conditions)))]
+        return self
@@ -7,12 +7,11 @@ import pandas as pd
 import sklearn
 
 import sklearn.cluster
+import scipy.cluster.hierarchy
 from copy import deepcopy
 
 import mvlearn
 
-from skrules import SkopeRules
-
 import sklearn.cluster
 
 import json
@@ -20,23 +19,32 @@ import json
 import ipyvuetify as v
 
 from antakia.potato import Potato
+from antakia.rules import filter_rules, positions_mask, make_rule_learner
 import antakia.potato as potato
 
 # Private utils functions
 
-def _conflict_handler(ens_potatoes, liste):
+def _conflict_handler(ens_potatoes, liste, labels=None):
     # function that allows you to manage conflicts in the list of regions.
     # indeed, as soon as a region is added to the list of regions, the points it contains are removed from the other regions
-    gliste = [x.indexes for x in ens_potatoes]
-    for i in range(len(gliste)):
-        a = 0
-        for j in range(len(gliste[i])):
-            if gliste[i][j - a] in liste:
-                gliste[i].pop(j - a)
-                a += 1
-    for i in range(len(ens_potatoes)):
-        ens_potatoes[i].setIndexes(gliste[i])
-    return ens_potatoes
+    # if the labels of the regions are given (see AntakIA.getRegionLabels), they are updated, and when the regions are disjoint the owners of the points are read from them
+    # returns the regions and the number of points each one lost
+    lost = np.zeros(len(ens_potatoes), dtype=int)
+    if len(ens_potatoes) == 0:
+        return ens_potatoes, lost
+    new_points = positions_mask(liste, len(ens_potatoes[0].mask))
+    # the labels only give the last owner of a point : they are enough if no point is in two regions
+    disjoint = labels is not None and sum(len(potato) for potato in ens_potatoes) == np.count_nonzero(labels >= 0)
+    if disjoint:
+        owners = labels[new_points]
+        lost = np.bincount(owners[owners >= 0], minlength=len(ens_potatoes))
+    else:
+        lost = np.array([np.count_nonzero(potato.mask & new_points) for potato in ens_potatoes])
+    if labels is not None:
+        labels[new_points] = -1
+    for i in np.flatnonzero(lost):
+        ens_potatoes[i].setIndexes(ens_potatoes[i].mask & ~new_points)
+    return ens_potatoes, lost
 
 def _create_list_invert(liste, taille):
     l = [[] for _ in range(taille)]
@@ -53,45 +61,55 @@ def _reset_list(l):
     return l
 
 
-def _find_best_k(X, indices, recall_min, precision_min):
+def _cluster_tree(X, ks, neighbors=None, indices=None):
+    # the agglomerative (ward) tree is computed once, and cut at each number of clusters of ks
+    # returns an array of shape (len(X), len(ks)) : the labels for each k
+    if neighbors is None:
+        Z = scipy.cluster.hierarchy.ward(np.asarray(X, dtype=float))
+    else:
+        # only the neighbors can be merged (faster on large datasets)
+        connectivity = neighbors.graph(min(10, neighbors.n_neighbors - 1), indices)
+        agglo = sklearn.cluster.AgglomerativeClustering(
+            n_clusters=None, distance_threshold=0, compute_full_tree=True, connectivity=connectivity
+        ).fit(X)
+        n = len(X)
+        counts = np.ones(2 * n - 1)
+        for m, (a, b) in enumerate(agglo.children_):
+            counts[n + m] = counts[a] + counts[b]
+        Z = np.column_stack([agglo.children_, agglo.distances_, counts[n:]]).astype(float)
+    return scipy.cluster.hierarchy.cut_tree(Z, n_clusters=ks)
+
+
+def _find_best_k(X, indices, recall_min, precision_min, neighbors=None, rule_engine="skope"):
+    # the largest number of clusters (from 2 to 8) such that every cluster can be described by rules
+    # returns this number and the labels of the points of indices
     recall_min = 0.7
     precision_min = 0.7
+    indices = np.asarray(indices)
     new_X = X.iloc[indices]
+    ks = [k for k in range(2, 9) if k <= len(indices)]
+    trees = _cluster_tree(new_X, ks, neighbors, indices)
+
+    def describable(labels, j):
+        y = np.zeros(len(X), dtype=int)
+        y[indices[labels == j]] = 1
+        skope_rules_clf = make_rule_learner(rule_engine, new_X.columns, precision_min, recall_min)
+        skope_rules_clf.fit(X, y)
+        return len(skope_rules_clf.rules_) > 0
+
     ind_f = 2
-    for i in range(2, 9):
-        #kmeans = sklearn.cluster.KMeans(n_clusters=i, random_state=9, n_init="auto")
-        agglo = sklearn.cluster.AgglomerativeClustering(n_clusters=i)
-        agglo.fit(new_X)
-        labels = agglo.labels_
-        a = True
-        for j in range(max(labels) + 1):
-            y = []
-            for k in range(len(X)):
-                if k in indices and labels[indices.index(k)] == j:
-                    y.append(1)
-                else:
-                    y.append(0)
-            skope_rules_clf = SkopeRules(
-                feature_names=new_X.columns,
-                random_state=42,
-                n_estimators=5,
-                recall_min=recall_min,
-                precision_min=precision_min,
-                max_depth_duplication=0,
-                max_samples=1.0,
-                max_depth=3,
-            )
-            skope_rules_clf.fit(X, y)
-            if len(skope_rules_clf.rules_) == 0:
-                ind_f = i - 1
-                a = False
-                break
-        if a == False:
+    # the search stops at the first cluster that cannot be described
+    # (the fits are run one after the other : SkopeRules mostly holds the GIL, threads do not make it faster)
+    for column, k in enumerate(ks):
+        labels = trees[:, column]
+        if not all(describable(labels, j) for j in range(k)):
+            ind_f = k - 1
             break
-    return 2 if ind_f == 1 else ind_f
+    k = 2 if ind_f == 1 else ind_f
+    return k, trees[:, ks.index(k)] if k in ks else np.zeros(len(indices), dtype=int)
 
 
-def _clustering_dyadique(X, SHAP, n_clusters, default):
+def _clustering_dyadique(X, SHAP, n_clusters, default, neighbors=None, rule_engine="skope"):
     m_kmeans = mvlearn.cluster.MultiviewKMeans(n_clusters=n_clusters, random_state=9)
     l = m_kmeans.fit_predict([X, SHAP])
     nombre_clusters = 0
@@ -104,24 +122,12 @@ def _clustering_dyadique(X, SHAP, n_clusters, default):
         for i in range(n_clusters):
             y_train = [1 if x == i else 0 for x in l_copy]
             indices = [i for i in range(len(y_train)) if y_train[i] == 1]
-            skope_rules_clf = SkopeRules(
-                feature_names=X_train.columns,
-                random_state=42,
-                n_estimators=5,
-                recall_min=recall_min,
-                precision_min=precision_min,
-                max_depth_duplication=0,
-                max_samples=1.0,
-                max_depth=3,
-            )
+            skope_rules_clf = make_rule_learner(rule_engine, X_train.columns, precision_min, recall_min)
             skope_rules_clf.fit(X_train, y_train)
             if len(skope_rules_clf.rules_) == 0:
-                k = _find_best_k(X, indices, recall_min, precision_min)
+                k, labels = _find_best_k(X, indices, recall_min, precision_min, neighbors, rule_engine)
                 nombre_clusters += k
-                #kmeans = sklearn.cluster.KMeans(n_clusters=k, random_state=9)
-                agglo = sklearn.cluster.AgglomerativeClustering(n_clusters=k)
-                agglo.fit(X.iloc[indices])
-                labels = np.array(agglo.labels_) + max_
+                labels = labels + max_
                 max_ += k
                 l[indices] = labels
             else :
@@ -133,7 +139,7 @@ def _clustering_dyadique(X, SHAP, n_clusters, default):
 # Public utils functions
 
 
-def function_auto_clustering(X1, X2, n_clusters, default):
+def function_auto_clustering(X1, X2, n_clusters, default, neighbors=None, rule_engine="skope"):
     """Return a clustering, generated a dyadic way.
 
     Function that allows to cluster the data in a dyadic way : the clusters are both in the X1 and X2 spaces.
@@ -150,6 +156,10 @@ def function_auto_clustering(X1, X2, n_clusters, default):
     default : bool
         If False, the clustering will be done with a fixed number of cluster (n_clusters). If True, the clustering will be done with a variable number of clusters.
         The algorithm will then try to find the best number of clusters to use.
+    neighbors : NeighborIndex object
+        If not None, the agglomerative clustering only merges neighbors (see antakia.neighbors), which is much faster on large datasets.
+    rule_engine : str
+        The rule learner used to check that a cluster can be described by rules : "skope" for SkopeRules, "native" for the faster antakia.rules.IntervalRules.
 
     Returns
     -------
@@ -171,7 +181,7 @@ def function_auto_clustering(X1, X2, n_clusters, default):
     [0, 0, 1, 1]
 
     """
-    return _clustering_dyadique(X1, X2, n_clusters, default)
+    return _clustering_dyadique(X1, X2, n_clusters, default, neighbors, rule_engine)
 
 
 def create_save(atk, liste, name: str = "Default name"):
@@ -271,13 +281,7 @@ def fromRules(df, rules_list):
     3  2.5  0.33
 
     """
-    l = rules_list
-    for i in range(len(l)):
-        regle1 = "df.loc[" + str(l[i][0]) + l[i][1] + "df['" + l[i][2] + "']]"
-        regle2 = "df.loc[" + "df['" + l[i][2] + "']" + l[i][3] + str(l[i][4]) + "]"
-        df = eval(regle1)
-        df = eval(regle2)
-    return df
+    return filter_rules(df, rules_list, output="view", join="and")
 
 def _add_tooltip(widget, text):
     # function that allows you to add a tooltip to a widget
@@ -0,0 +1,46 @@
+"""
+Benchmark of the projections : time of two separate fits (2D and 3D) against one call to `compute_multi`, for each method.
+t-SNE has nothing to share between the dimensions : both timings should be the same.
+
+Usage : python benchmarks/projections.py [--rows 5000] [--columns 10]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from antakia import compute
+
+
+def timed(function):
+    start = time.time()
+    function()
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument("--methods", nargs="+", default=["PCA", "t-SNE", "UMAP", "PaCMAP"])
+    options = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(options.rows, options.columns)))
+
+    # the numba functions of UMAP and PaCMAP are compiled before the timings
+    for method in options.methods:
+        compute.DimensionalityReductionChooser(method).compute_multi(X.iloc[:200], [2, 3], True)
+
+    print("method      2D + 3D (s)   multi (s)   saving")
+    for method in options.methods:
+        dim_red = compute.DimensionalityReductionChooser(method)
+        separate = timed(lambda: [dim_red.compute(X, 2, True), dim_red.compute(X, 3, True)])
+        multi = timed(lambda: dim_red.compute_multi(X, [2, 3], True))
+        print(f"{method:<10}  {separate:>11.2f}   {multi:>9.2f}   {1 - multi / separate:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark of the rule learners : precision, recall and time of SkopeRules against the native `IntervalRules`, on selections that are boxes (plus some noise) of random data.
+The precision and the recall are measured on the whole dataset, for the rule actually applied by AntakIA (the first one).
+
+Usage : python benchmarks/rule_learners.py [--rows 10000] [--columns 10] [--selections 5]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from antakia.rules import make_rule_learner, RULE_ENGINES
+
+
+def rule_mask(X, rule):
+    # the points respecting a rule string of the learners, like "a > 0.1 and a <= 0.4"
+    mask = np.ones(len(X), dtype=bool)
+    for term in rule.split(" and "):
+        column, operator, value = term.split(" ")
+        values = X[column].to_numpy()
+        mask &= {"<=": values <= float(value), "<": values < float(value), ">": values > float(value), ">=": values >= float(value)}[operator]
+    return mask
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument("--selections", type=int, default=5)
+    parser.add_argument("--noise", type=float, default=0.05)
+    options = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.random((options.rows, options.columns)), columns=["x" + str(i) for i in range(options.columns)])
+
+    results = {engine: [] for engine in RULE_ENGINES}
+    for _ in range(options.selections):
+        # a box on 1 to 3 features, with some points flipped
+        features = rng.choice(options.columns, size=rng.integers(1, 4), replace=False)
+        y = np.ones(options.rows, dtype=bool)
+        for feature in features:
+            low = rng.uniform(0, 0.5)
+            y &= (X.iloc[:, feature] >= low).to_numpy() & (X.iloc[:, feature] <= low + rng.uniform(0.3, 0.5)).to_numpy()
+        y ^= rng.random(options.rows) < options.noise
+        for engine in RULE_ENGINES:
+            learner = make_rule_learner(engine, X.columns, 0.5, 0.5)
+            start = time.time()
+            learner.fit(X, y.astype(int))
+            duration = time.time() - start
+            if len(learner.rules_) == 0:
+                results[engine].append((0, 0, duration))
+                continue
+            selected = rule_mask(X, learner.rules_[0][0])
+            tp = np.count_nonzero(selected & y)
+            results[engine].append((tp / max(np.count_nonzero(selected), 1), tp / np.count_nonzero(y), duration))
+
+    print("engine    precision   recall   time (s)")
+    for engine, values in results.items():
+        precision, recall, duration = np.mean(values, axis=0)
+        print(f"{engine:<8}  {precision:>9.3f}   {recall:>6.3f}   {duration:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
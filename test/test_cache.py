@@ -0,0 +1,109 @@
+import unittest
+import os
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+import antakia.potato
+from antakia import AntakIA, Dataset, Potato
+from antakia.cache import DiskCache, MemoryCache, fingerprint_data, fingerprint_mask, make_key
+
+# Define class to test the on-disk cache
+class TestDiskCache(unittest.TestCase):
+	def setUp(self):
+		self.dir = tempfile.TemporaryDirectory()
+		self.cache = DiskCache(self.dir.name, max_size=1)
+
+	def tearDown(self):
+		self.dir.cleanup()
+
+	def test_get_set(self):
+		a = np.arange(12.).reshape(3, 4)
+		self.cache.set("a", a, kind="SHAP")
+		self.assertTrue(np.array_equal(self.cache.get("a"), a))
+		self.assertIsNone(self.cache.get("b"))
+		# a new cache on the same directory finds the entry
+		self.assertTrue(np.array_equal(DiskCache(self.dir.name).get("a"), a))
+
+	def test_eviction(self):
+		# each array is 0.4 MB : only two of them fit in 1 MB
+		for key in ["a", "b", "c"]:
+			self.cache.set(key, np.zeros(50000))
+			self.cache.get("a")
+		self.assertIn("a", self.cache)
+		self.assertNotIn("b", self.cache)
+		self.assertIn("c", self.cache)
+
+	def test_read_does_not_write(self):
+		self.cache.set("a", np.zeros(3))
+		index = os.path.join(self.dir.name, DiskCache.INDEX)
+		written = os.path.getmtime(index)
+		time.sleep(0.01)
+		self.cache.get("a")
+		self.assertEqual(os.path.getmtime(index), written)
+		self.cache.flush()
+		self.assertGreater(os.path.getmtime(index), written)
+		# no temporary file is left in the directory
+		self.assertEqual(sorted(os.listdir(self.dir.name)), ["a.npy", DiskCache.INDEX])
+
+	def test_invalidate(self):
+		self.cache.set("a", np.zeros(3), kind="SHAP")
+		self.cache.set("b", np.zeros(3), kind="LIME")
+		self.assertEqual(self.cache.invalidate(kind="SHAP"), 1)
+		self.assertNotIn("a", self.cache)
+		self.assertEqual(self.cache.invalidate(), 1)
+		self.assertEqual(len(self.cache), 0)
+
+	def test_fingerprint(self):
+		X = pd.DataFrame([[1, 2], [3, 4]], columns=["a", "b"])
+		self.assertEqual(fingerprint_data(X), fingerprint_data(X.copy()))
+		self.assertNotEqual(fingerprint_data(X), fingerprint_data(X.replace(4, 5)))
+		self.assertNotEqual(make_key("SHAP", 1), make_key("LIME", 1))
+
+	def test_memory_cache(self):
+		cache = MemoryCache(max_entries=2)
+		cache.set("a", 1)
+		cache.set("b", 2)
+		cache.get("a")
+		cache.set("c", 3)
+		self.assertEqual(cache.get("a"), 1)
+		self.assertNotIn("b", cache)
+		self.assertEqual(len(cache), 2)
+		mask = np.array([True, False, True])
+		self.assertEqual(fingerprint_mask(mask), fingerprint_mask(mask.astype(int)))
+		self.assertNotEqual(fingerprint_mask(mask), fingerprint_mask(~mask))
+
+
+# Define class to test the cache of the rules of the selections
+class TestSkopeCache(unittest.TestCase):
+	def setUp(self):
+		rng = np.random.default_rng(0)
+		self.X = pd.DataFrame(rng.random((200, 2)), columns=['a', 'b'])
+		y = self.X['a'] * 2
+		self.atk = AntakIA(Dataset(X=self.X, y=y, model=LinearRegression().fit(self.X, y)), import_explanation=self.X.copy())
+		self.fits = 0
+		self.make_rule_learner = antakia.potato.make_rule_learner
+		def counted(*args):
+			self.fits += 1
+			return self.make_rule_learner(*args)
+		antakia.potato.make_rule_learner = counted
+
+	def tearDown(self):
+		antakia.potato.make_rule_learner = self.make_rule_learner
+
+	def test_fit_skope(self):
+		potato = Potato(self.atk, np.flatnonzero(self.X['a'] < 0.3))
+		result = potato.fitSkope("Imported", rule_engine="native")
+		self.assertEqual(self.fits, 2)
+		self.assertEqual(potato.fitSkope("Imported", rule_engine="native"), result)
+		self.assertEqual(self.fits, 2)
+		# the rules found before the new observations are not reused
+		self.atk.appendData(self.X.iloc[:5], self.X['a'].iloc[:5] * 2, import_explanation=self.X.iloc[:5], update_explanations=False, verbose=False)
+		self.assertEqual(len(self.atk.skope_cache), 0)
+		potato.fitSkope("Imported", rule_engine="native")
+		self.assertEqual(self.fits, 4)
+
+
+if __name__ == '__main__':
+	unittest.main()
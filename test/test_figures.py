@@ -0,0 +1,29 @@
+import unittest
+import numpy as np
+from antakia.figures import subsample, encode, points_in_polygon
+
+# Define class to test the helpers of the figures
+class TestFigures(unittest.TestCase):
+	def test_subsample(self):
+		rng = np.random.default_rng(0)
+		coordinates = np.vstack([rng.normal(size=(10000, 2)), [[50, 50]]])
+		kept = subsample(coordinates, 1000)
+		self.assertTrue(len(kept) < 2000)
+		# the isolated point is kept
+		self.assertIn(10000, kept)
+		self.assertTrue(np.array_equal(subsample(coordinates[:10], 1000), np.arange(10)))
+
+	def test_encode(self):
+		self.assertEqual(encode([1, 2, 3]).dtype, np.uint8)
+		self.assertEqual(encode([0.1, 1.0]).dtype, np.float32)
+		self.assertEqual(encode([1, 1, 1], True), 1)
+		self.assertEqual(encode(["red", "grey"]), ["red", "grey"])
+		self.assertIsNone(encode(None))
+
+	def test_points_in_polygon(self):
+		inside = points_in_polygon([0.5, 2, 0.5], [0.5, 0.5, 2], [0, 1, 1, 0], [0, 0, 1, 1])
+		self.assertEqual(list(inside), [True, False, False])
+
+
+if __name__ == '__main__':
+	unittest.main()
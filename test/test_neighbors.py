@@ -0,0 +1,45 @@
+import unittest
+import numpy as np
+import pandas as pd
+from antakia.neighbors import NeighborIndex
+
+# Define class to test the shared index of the nearest neighbors
+class TestNeighborIndex(unittest.TestCase):
+	def setUp(self):
+		self.X = pd.DataFrame(np.random.default_rng(0).normal(size=(50, 3)))
+		self.index = NeighborIndex.build(self.X, n_neighbors=6)
+
+	def test_build(self):
+		self.assertEqual(self.index.n_neighbors, 6)
+		self.assertTrue(np.array_equal(self.index.indices[:, 0], np.arange(50)))
+		self.assertTrue(self.index.matches(self.X))
+		self.assertFalse(self.index.matches(self.X * 2))
+
+	def test_pairs(self):
+		pairs = self.index.pairs(5)
+		self.assertEqual(pairs.shape, (250, 2))
+		self.assertTrue(np.all(pairs[:, 0] != pairs[:, 1]))
+
+	def test_graph(self):
+		self.assertEqual(self.index.graph(5).nnz, 250)
+		subset = list(range(0, 50, 2))
+		graph = self.index.graph(5, subset)
+		self.assertEqual(graph.shape, (25, 25))
+		self.assertTrue(graph.nnz <= 125)
+		with self.assertRaises(ValueError):
+			self.index.knn(7)
+
+	def test_tsne_uses_graph(self):
+		from antakia.compute import computationTSNE
+		X = pd.DataFrame(np.random.default_rng(0).normal(size=(120, 3)))
+		index = NeighborIndex.build(X)
+		calls = []
+		graph = index.graph
+		index.graph = lambda k, **kwargs: calls.append(k) or graph(k, **kwargs)
+		projections = computationTSNE().compute_multi(X, [2], neighbors=index)
+		self.assertEqual(calls, [91])
+		self.assertEqual(projections[0].shape, (120, 2))
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from antakia import AntakIA, Dataset, Potato
+from antakia.regions import RegionSet
+from antakia.utils import _conflict_handler
+
+# Define class to test the set of regions
+class TestRegionSet(unittest.TestCase):
+	def setUp(self):
+		self.X = pd.DataFrame({'a': [1, 2, 3, 4, 5, 2.5], 'b': [0.1, 0.2, 0.3, 0.4, 0.5, 0.33]})
+		self.regions = RegionSet.fromRules(self.X, [[[0, '<=', 'a', '<=', 2.5]], [[2.5, '<=', 'a', '<=', 4]]])
+
+	def test_labels(self):
+		# the point shared by the two regions belongs to the last one
+		self.assertEqual(self.regions.labels.tolist(), [0, 0, 1, 1, -1, 1])
+		self.assertEqual(self.regions.sizes().tolist(), [2, 3])
+		self.assertEqual(self.regions.overlaps.tolist(), [[3, 1], [1, 3]])
+		self.assertTrue(self.regions.conflicts())
+		self.assertEqual(self.regions.uncovered().tolist(), [False] * 4 + [True, False])
+
+	def test_split(self):
+		parts = self.regions.split(self.X)
+		self.assertEqual(parts[0]['a'].tolist(), [1, 2])
+		self.assertEqual(parts[1]['a'].tolist(), [3, 4, 2.5])
+		self.assertEqual(parts[1].index.tolist(), [2, 3, 5])
+		self.assertEqual([p.tolist() for p in self.regions.positions()], [[0, 1], [2, 3, 5]])
+
+
+# Define class to test the removal of the points of a new region from the others
+class TestConflictHandler(unittest.TestCase):
+	def setUp(self):
+		X = pd.DataFrame(np.random.default_rng(0).random((10, 2)), columns=['a', 'b'])
+		y = X['a'] * 2
+		self.atk = AntakIA(Dataset(X=X, y=y, model=LinearRegression().fit(X, y)), import_explanation=X.copy())
+
+	def test_overlapping_regions(self):
+		# the points 2 and 3 are in both regions
+		self.atk.newRegion(Potato(self.atk, [0, 1, 2, 3]))
+		self.atk.newRegion(Potato(self.atk, [2, 3, 4]))
+		labels = self.atk.getRegionLabels()
+		regions, lost = _conflict_handler(self.atk.regions, [1, 2, 4], labels)
+		self.assertEqual(lost.tolist(), [2, 2])
+		self.assertEqual(regions[0].indexes, [0, 3])
+		self.assertEqual(regions[1].indexes, [3])
+		self.assertTrue(np.array_equal(labels, RegionSet.fromRegions(regions).labels))
+
+
+if __name__ == '__main__':
+	unittest.main()
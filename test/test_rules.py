@@ -0,0 +1,58 @@
+import unittest
+import numpy as np
+import pandas as pd
+from antakia.rules import rules_mask, ColumnIndex, filter_rules, filter_rule_sets, IntervalRules
+
+# Define class to test the evaluation of the rules
+class TestRules(unittest.TestCase):
+	def setUp(self):
+		self.X = pd.DataFrame({'a': [1, 2, 3, 4, 5, 2.5], 'b': [0.1, 0.2, 0.3, 0.4, 0.5, 0.33]})
+
+	def test_and_across_features(self):
+		mask = rules_mask(self.X, [[1.5, '<=', 'a', '<=', 3], [0.1, '<=', 'b', '<=', 0.3]])
+		self.assertEqual(np.flatnonzero(mask).tolist(), [1, 2])
+
+	def test_or_within_feature(self):
+		mask = rules_mask(self.X, [[0, '<=', 'a', '<=', 1], [4.5, '<=', 'a', '<=', 5], [0, '<=', 'b', '<=', 1]])
+		self.assertEqual(np.flatnonzero(mask).tolist(), [0, 4])
+
+	def test_strict_and_restrict(self):
+		mask = rules_mask(self.X, [[1, '<', 'a', '<', 5]], restrict=[0, 1, 2])
+		self.assertEqual(np.flatnonzero(mask).tolist(), [1, 2])
+		self.assertTrue(rules_mask(self.X, []).all())
+
+
+	def test_column_index(self):
+		index = ColumnIndex(self.X['a'])
+		rules = [[1.5, '<=', 'a', '<=', 3], [2, '<', 'a', '<', 5], [6, '<=', 'a', '<=', 7]]
+		for rule in rules:
+			self.assertEqual(index.mask(rule).tolist(), rules_mask(self.X, [rule]).tolist())
+		self.assertEqual(index.between(rules[0]).tolist(), [2, 2.5, 3])
+		mask = rules_mask(self.X, rules + [[0.2, '<=', 'b', '<=', 1]], index=lambda column: ColumnIndex(self.X[column]))
+		self.assertEqual(mask.tolist(), rules_mask(self.X, rules + [[0.2, '<=', 'b', '<=', 1]]).tolist())
+
+
+	def test_filter(self):
+		rules = [[1.5, '<=', 'a', '<=', 3], [2.2, '<=', 'a', '<=', 4]]
+		self.assertEqual(filter_rules(self.X, rules).index.tolist(), [1, 2, 3, 5])
+		self.assertEqual(filter_rules(self.X, rules, output="indices", join="and").tolist(), [2, 5])
+		masks = filter_rule_sets(self.X, [rules, rules[:1], None])
+		self.assertEqual([mask.sum() for mask in masks], [4, 3, 6])
+		self.assertRaises(ValueError, filter_rules, self.X, rules, "list")
+
+
+	def test_interval_rules(self):
+		rng = np.random.default_rng(0)
+		X = pd.DataFrame(rng.random((2000, 4)), columns=['a', 'b', 'c', 'd'])
+		y = ((X['a'] > 0.2) & (X['a'] <= 0.6) & (X['c'] <= 0.5)).astype(int)
+		learner = IntervalRules(X.columns, 0.9, 0.9).fit(X, y)
+		rule, (precision, recall, depth) = learner.rules_[0]
+		self.assertGreater(precision, 0.9)
+		self.assertGreater(recall, 0.9)
+		self.assertEqual(sorted(set(term.split(" ")[0] for term in rule.split(" and "))), ['a', 'c'])
+		# no rule is precise enough for random points
+		self.assertEqual(IntervalRules(X.columns, 0.9, 0.9).fit(X, rng.random(2000) < 0.3).rules_, [])
+
+
+if __name__ == '__main__':
+	unittest.main()